@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Benchmark the full fetch_versions.py refresh against a local fake GitHub API.
+
+For each synthetic org size (generated by synthetic_org.py) and each
+configuration this runs the whole pipeline in a fresh working directory, in
+its own process, and records wall time, requests made, response bytes
+received and peak memory (max RSS).
+
+Configurations:
+
+    curl          sequential, one curl process per request (the original transport)
+    pooled        sequential, over the pooled keep-alive client
+    concurrent    --workers 8
+    hedged        --workers 8 --hedge
+    adaptive      --workers 32 --adaptive
+    graphql       --backend graphql
+    incremental   --incremental --full, after an untimed warm-up run
+    steady-state  a default run after an untimed warm-up run, so stored
+                  state and ETags apply
+
+Results are written as JSON so runs can be compared over time:
+
+    python benchmark.py --sizes 80,1000 --latency 0.02 --output results.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from synthetic_org import DEFAULT_MAX_TAGS, generate_fixture
+
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+DEFAULT_SIZES = [80, 1000, 10000]
+DEFAULT_OUTPUT = SCRIPT_DIR / "benchmark_results.json"
+
+CONFIGS = {
+    "curl": {"args": ["--workers", "1"], "transport": "curl"},
+    "pooled": {"args": ["--workers", "1"]},
+    "concurrent": {"args": ["--workers", "8"]},
+    "hedged": {"args": ["--workers", "8", "--hedge"]},
+    "adaptive": {"args": ["--workers", "32", "--adaptive"]},
+    "graphql": {"args": ["--backend", "graphql"]},
+    "incremental": {"warmup": [], "args": ["--incremental", "--full"]},
+    "steady-state": {"warmup": [], "args": []},
+}
+
+
+class CurlClient:
+    """Stand-in for fetch_versions.HTTPClient that runs one curl process per request."""
+
+    def __init__(self, fetch_versions):
+        self.fetch_versions = fetch_versions
+        self.stats = fetch_versions.HTTPStats()
+        self.max_idle = 0
+        self.connect_timeout = fetch_versions.CONNECT_TIMEOUT
+        self.read_timeout = fetch_versions.READ_TIMEOUT
+
+    def request(self, method, url, headers=None, body=None, timeout=None):
+        command = ["curl", "-s", "-i", "-X", method, "--connect-timeout", str(self.connect_timeout)]
+        if timeout is not None:
+            command += ["--max-time", str(timeout)]
+        for name, value in (headers or {}).items():
+            if name != "Accept-Encoding":
+                command += ["-H", f"{name}: {value}"]
+        command += ["-H", f"User-Agent: {self.fetch_versions.USER_AGENT}"]
+        if body is not None:
+            command += ["--data-binary", "@-"]
+        start = time.perf_counter()
+        result = subprocess.run(command + [url], input=body, capture_output=True, check=True)
+        elapsed = time.perf_counter() - start
+
+        head, _, data = result.stdout.partition(b"\r\n\r\n")
+        lines = head.decode("iso-8859-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        response_headers = dict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+
+        self.stats.requests += 1
+        self.stats.connections_opened += 1
+        self.stats.bytes_received += len(data)
+        self.stats.timings.append(elapsed)
+        return self.fetch_versions.Response(status, response_headers, data, elapsed)
+
+    def close(self):
+        pass
+
+
+def run_child(workdir: Path, transport: str, args: list[str]) -> None:
+    """Run fetch_versions.main() from a copy in workdir and print its counters as JSON."""
+    sys.path.insert(0, str(workdir))
+    import fetch_versions
+
+    if transport == "curl":
+        fetch_versions._client = CurlClient(fetch_versions)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        fetch_versions.main(args)
+    wall_time = time.perf_counter() - start
+    stats = fetch_versions.get_client().stats
+    json.dump(
+        {"wall_time": wall_time, "requests": stats.requests, "bytes": stats.bytes_received},
+        sys.stdout,
+    )
+
+
+def run_pipeline(workdir: Path, server_url: str, transport: str, args: list[str]) -> dict:
+    """Run one refresh in a child process, returning its counters and peak RSS."""
+    env = dict(os.environ, GITHUB_API_URL=server_url, GITHUB_SERVER_URL=server_url, GITHUB_TOKEN="benchmark")
+    process = subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "--child", str(workdir), transport, "--", *args],
+        stdout=subprocess.PIPE,
+        env=env,
+    )
+    output = process.stdout.read()
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise RuntimeError(f"benchmark run {args} failed with exit code {process.returncode}")
+    result = json.loads(output)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    result["peak_memory"] = rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return result
+
+
+def prepare_workdir(root: Path, org: str) -> Path:
+    """Make an empty working directory holding a copy of fetch_versions.py set to org."""
+    workdir = Path(tempfile.mkdtemp(dir=root))
+    source = (SCRIPT_DIR / "fetch_versions.py").read_text()
+    source = re.sub(r'^ORG_NAME = ".*"$', f"ORG_NAME = {json.dumps(org)}", source, count=1, flags=re.M)
+    (workdir / "fetch_versions.py").write_text(source)
+    (workdir / "README.md").write_text("# benchmark\n")
+    return workdir
+
+
+@contextlib.contextmanager
+def fake_server(
+    fixture_path: Path, latency: float, jitter: float, slow_rate: float, slow_latency: float, max_concurrent: int | None
+):
+    """Run fake_github.py in its own process so it doesn't share our memory or GIL."""
+    command = [
+        sys.executable, str(SCRIPT_DIR / "fake_github.py"), str(fixture_path), "--port", "0",
+        "--latency", str(latency), "--jitter", str(jitter),
+        "--slow-rate", str(slow_rate), "--slow-latency", str(slow_latency),
+    ]
+    if max_concurrent is not None:
+        command += ["--max-concurrent", str(max_concurrent)]
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        url = process.stdout.readline().rsplit(" at ", 1)[1].strip()
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fetch_versions.py refresh strategies")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="comma-separated synthetic org sizes (default %(default)s)",
+    )
+    parser.add_argument(
+        "--configs",
+        default=",".join(CONFIGS),
+        help="comma-separated configurations to run (default %(default)s)",
+    )
+    parser.add_argument("--max-tags", type=int, default=DEFAULT_MAX_TAGS, help="most tags any repo can have")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds of simulated latency per request")
+    parser.add_argument("--jitter", type=float, default=0.01, help="extra random latency per request")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of requests that are slow")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="extra seconds a slow request takes")
+    parser.add_argument(
+        "--max-concurrent", type=int, help="requests the server allows in flight before a secondary rate limit"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="JSON results file")
+    parser.add_argument("--child", nargs=2, metavar=("WORKDIR", "TRANSPORT"), help=argparse.SUPPRESS)
+    parser.add_argument("args", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(Path(args.child[0]), args.child[1], args.args)
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    configs = args.configs.split(",")
+    for config in configs:
+        if config not in CONFIGS:
+            parser.error(f"unknown configuration {config!r}, choose from {', '.join(CONFIGS)}")
+
+    org = "bench"
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        for size in sizes:
+            fixture_path = root / f"fixture-{size}.json"
+            fixture_path.write_text(json.dumps(generate_fixture({org: size}, args.seed, args.max_tags)))
+            with fake_server(fixture_path, args.latency, args.jitter, args.slow_rate, args.slow_latency, args.max_concurrent) as server_url:
+                for config in configs:
+                    spec = CONFIGS[config]
+                    transport = spec.get("transport", "pooled")
+                    workdir = prepare_workdir(root, org)
+                    if "warmup" in spec:
+                        run_pipeline(workdir, server_url, transport, spec["warmup"])
+                    result = run_pipeline(workdir, server_url, transport, spec["args"])
+                    result.update(config=config, repos=size)
+                    results.append(result)
+                    shutil.rmtree(workdir)
+                    print(
+                        f"{size:>6} repos  {config:<13} {result['wall_time']:8.2f}s "
+                        f"{result['requests']:>7} requests {result['bytes'] / 1e6:9.2f}MB "
+                        f"peak {result['peak_memory'] / 1e6:7.1f}MB",
+                        flush=True,
+                    )
+
+    args.output.write_text(json.dumps({
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "slow_rate": args.slow_rate,
+        "slow_latency": args.slow_latency,
+        "max_concurrent": args.max_concurrent,
+        "max_tags": args.max_tags,
+        "seed": args.seed,
+        "results": results,
+    }, indent=2) + "\n")
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
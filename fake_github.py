@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+"""
+A local stand-in for the parts of the GitHub API that fetch_versions.py uses,
+so every fetch strategy can be tested and benchmarked offline.
+
+It serves:
+
+    GET  /orgs/{org}/repos and /users/{user}/repos
+    GET  /repos/{owner}/{repo}/tags
+    GET  /repos/{owner}/{repo}/git/matching-refs/tags/{prefix}
+    GET  /repos/{owner}/{repo}/git/ref/tags/{tag}
+    POST /graphql (the aliased repository refs queries fetch_versions builds)
+    POST /{owner}/{repo}.git/git-upload-pack (git protocol v2 ls-refs)
+
+with configurable latency (including an occasional slow response), page sizes,
+ETags, rate limiting, a cap on concurrent requests and random server errors.
+
+The data is a fixture of the form:
+
+    {"orgs": {"actions": [{"name": "checkout", "id": 1, "pushed_at": "...",
+                           "archived": false, "fork": false, "tags": ["v1", "v1.0.0"]}]},
+     "users": {}}
+
+Run it with: python fake_github.py fixture.json --port 8000
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+
+SECONDARY_LIMIT_MESSAGE = "You have exceeded a secondary rate limit. Please wait a few minutes before you try again."
+
+# Matches one aliased lookup in the queries built by fetch_versions.build_tags_query
+GRAPHQL_REPO_PATTERN = re.compile(
+    r'(\w+): repository\(owner: "([^"]*)", name: "([^"]*)"\)\s*\{\s*'
+    r'refs\(refPrefix: "([^"]*)", first: (\d+)(?:, after: "([^"]*)")?\)'
+)
+
+
+def fake_sha(*parts: str) -> str:
+    """A stable, fake object id."""
+    return hashlib.sha1("/".join(parts).encode()).hexdigest()
+
+
+def repo_json(base_url: str, owner: str, repo: dict) -> dict:
+    """
+    Build a repo object shaped like the real API's, URL fields and owner blob
+    included, so response sizes are realistic.
+    """
+    full_name = f"{owner}/{repo['name']}"
+    api = f"{base_url}/repos/{full_name}"
+    html = f"https://github.com/{full_name}"
+    data = {
+        "id": repo["id"],
+        "node_id": base64.b64encode(f"R_{repo['id']}".encode()).decode(),
+        "name": repo["name"],
+        "full_name": full_name,
+        "private": False,
+        "owner": {
+            "login": owner,
+            "id": 44036562,
+            "node_id": "MDEyOk9yZ2FuaXphdGlvbjQ0MDM2NTYy",
+            "avatar_url": "https://avatars.githubusercontent.com/u/44036562?v=4",
+            "url": f"{base_url}/users/{owner}",
+            "html_url": f"https://github.com/{owner}",
+            "repos_url": f"{base_url}/users/{owner}/repos",
+            "type": "Organization",
+            "site_admin": False,
+        },
+        "html_url": html,
+        "description": f"Synthetic repository {full_name}",
+        "fork": repo.get("fork", False),
+        "url": api,
+        "created_at": "2019-08-01T00:00:00Z",
+        "updated_at": repo.get("pushed_at"),
+        "pushed_at": repo.get("pushed_at"),
+        "git_url": f"git://github.com/{full_name}.git",
+        "ssh_url": f"git@github.com:{full_name}.git",
+        "clone_url": f"{html}.git",
+        "svn_url": html,
+        "homepage": None,
+        "size": 1024,
+        "stargazers_count": 0,
+        "watchers_count": 0,
+        "language": "TypeScript",
+        "forks_count": 0,
+        "archived": repo.get("archived", False),
+        "disabled": False,
+        "open_issues_count": 0,
+        "license": {"key": "mit", "name": "MIT License", "spdx_id": "MIT", "url": f"{base_url}/licenses/mit"},
+        "topics": [],
+        "visibility": "public",
+        "default_branch": "main",
+        "permissions": {"admin": False, "maintain": False, "push": False, "triage": False, "pull": True},
+    }
+    for name in (
+        "forks", "keys", "collaborators", "teams", "hooks", "issue_events", "events", "assignees",
+        "branches", "tags", "blobs", "git_tags", "git_refs", "trees", "statuses", "languages",
+        "stargazers", "contributors", "subscribers", "subscription", "commits", "git_commits",
+        "comments", "issue_comment", "contents", "compare", "merges", "archive", "downloads",
+        "issues", "pulls", "milestones", "notifications", "labels", "releases", "deployments",
+    ):
+        data[f"{name}_url"] = f"{api}/{name}"
+    return data
+
+
+class FakeGitHub:
+    """
+    The state behind a fake GitHub server: the fixture data, the behaviour
+    settings, rate limit budgets, and counters for what was served.
+    """
+
+    def __init__(
+        self,
+        fixture: dict,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 0.0,
+        max_per_page: int = 100,
+        etags: bool = True,
+        compress: bool = False,
+        rate_limit: int | None = None,
+        rate_limit_window: int = 3600,
+        secondary_limit_every: int | None = None,
+        max_concurrent: int | None = None,
+        retry_after: int = 1,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.fixture = fixture
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.max_per_page = max_per_page
+        self.etags = etags
+        self.compress = compress
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.secondary_limit_every = secondary_limit_every
+        self.max_concurrent = max_concurrent
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.base_url = ""
+
+        self.requests = 0
+        self.bytes_sent = 0
+        self.not_modified = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+        self.active = 0
+        self.peak_active = 0
+        self.endpoints: Counter[str] = Counter()
+        self._budgets: dict[tuple[str | None, str], list[float]] = {}
+        self._repos = {
+            (owner, repo["name"]): repo
+            for kind in ("orgs", "users")
+            for owner, repos in fixture.get(kind, {}).items()
+            for repo in repos
+        }
+        self._lock = threading.Lock()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.bytes_sent = 0
+            self.not_modified = 0
+            self.rate_limited = 0
+            self.server_errors = 0
+            self.peak_active = 0
+            self.endpoints.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "bytes_sent": self.bytes_sent,
+                "not_modified": self.not_modified,
+                "rate_limited": self.rate_limited,
+                "server_errors": self.server_errors,
+                "peak_active": self.peak_active,
+                "endpoints": dict(self.endpoints),
+            }
+
+    def delay(self) -> None:
+        with self._lock:
+            extra = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+            # The long tail: a few responses are much slower than the rest
+            if self.slow_rate and self.random.random() < self.slow_rate:
+                extra += self.slow_latency
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+
+    def admit(self) -> tuple[int, dict, dict[str, str]] | None:
+        """
+        Serve a request's latency, counting it as active meanwhile. Returns the
+        (status, body, headers) to reject it with if too many requests were
+        already active, as GitHub's secondary rate limit does, or if it is one
+        of the random server errors; otherwise None.
+        """
+        with self._lock:
+            if self.max_concurrent is not None and self.active >= self.max_concurrent:
+                self.requests += 1
+                self.rate_limited += 1
+                return 403, {"message": SECONDARY_LIMIT_MESSAGE}, {"Retry-After": str(self.retry_after)}
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            self.delay()
+        finally:
+            with self._lock:
+                self.active -= 1
+        if self.fail():
+            return 502, {"message": "Server Error"}, {}
+        return None
+
+    def fail(self) -> bool:
+        """Whether to answer this request with a 502, as a flaky upstream would."""
+        with self._lock:
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.requests += 1
+                self.server_errors += 1
+                return True
+            return False
+
+    def charge(self, resource: str, token: str | None = None) -> tuple[dict[str, str], tuple[int, dict] | None]:
+        """
+        Spend one request of the token's budget for the resource; like GitHub,
+        each token (and unauthenticated use) has a budget of its own. Returns the
+        rate limit headers and, if the request must be rejected, the (status,
+        body) to send instead.
+        """
+        with self._lock:
+            self.requests += 1
+            if self.secondary_limit_every and self.requests % self.secondary_limit_every == 0:
+                self.rate_limited += 1
+                return {"Retry-After": str(self.retry_after)}, (403, {"message": SECONDARY_LIMIT_MESSAGE})
+            if self.rate_limit is None:
+                return {}, None
+
+            now = time.time()
+            budget = self._budgets.get((token, resource))
+            if budget is None or budget[1] <= now:
+                budget = self._budgets[(token, resource)] = [self.rate_limit, now + self.rate_limit_window]
+            headers = {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Reset": str(int(budget[1])),
+                "X-RateLimit-Resource": resource,
+            }
+            if budget[0] <= 0:
+                self.rate_limited += 1
+                headers["X-RateLimit-Remaining"] = "0"
+                return headers, (403, {"message": "API rate limit exceeded"})
+            budget[0] -= 1
+            headers["X-RateLimit-Remaining"] = str(budget[0])
+            return headers, None
+
+    def refund(self, resource: str, token: str | None = None) -> None:
+        """Give back a request that was answered with 304, which GitHub doesn't count."""
+        with self._lock:
+            self.not_modified += 1
+            if (token, resource) in self._budgets:
+                self._budgets[(token, resource)][0] += 1
+
+    def repo(self, owner: str, name: str) -> dict | None:
+        return self._repos.get((owner, name))
+
+    def list_repos(self, kind: str, owner: str, query: dict) -> tuple[int, object]:
+        repos = self.fixture.get(kind, {}).get(owner)
+        if repos is None:
+            return 404, {"message": "Not Found"}
+        page = self.page(repos, query)
+        return 200, [repo_json(self.base_url, owner, repo) for repo in page]
+
+    def list_tags(self, owner: str, name: str, query: dict) -> tuple[int, object]:
+        repo = self.repo(owner, name)
+        if repo is None:
+            return 404, {"message": "Not Found"}
+        page = self.page(repo.get("tags", []), query)
+        return 200, [
+            {
+                "name": tag,
+                "zipball_url": f"{self.base_url}/repos/{owner}/{name}/zipball/refs/tags/{tag}",
+                "tarball_url": f"{self.base_url}/repos/{owner}/{name}/tarball/refs/tags/{tag}",
+                "commit": {
+                    "sha": fake_sha(owner, name, tag),
+                    "url": f"{self.base_url}/repos/{owner}/{name}/commits/{fake_sha(owner, name, tag)}",
+                },
+                "node_id": base64.b64encode(f"REF_{owner}/{name}/{tag}".encode()).decode(),
+            }
+            for tag in page
+        ]
+
+    def ref_json(self, owner: str, name: str, tag: str) -> dict:
+        return {
+            "ref": f"refs/tags/{tag}",
+            "node_id": base64.b64encode(f"REF_{owner}/{name}/{tag}".encode()).decode(),
+            "url": f"{self.base_url}/repos/{owner}/{name}/git/refs/tags/{tag}",
+            "object": {
+                "sha": fake_sha(owner, name, tag),
+                "type": "commit",
+                "url": f"{self.base_url}/repos/{owner}/{name}/git/commits/{fake_sha(owner, name, tag)}",
+            },
+        }
+
+    def matching_refs(self, owner: str, name: str, prefix: str) -> tuple[int, object]:
+        repo = self.repo(owner, name)
+        if repo is None:
+            return 404, {"message": "Not Found"}
+        if not repo.get("tags"):
+            return 409, {"message": "Git Repository is empty."}
+        return 200, [self.ref_json(owner, name, tag) for tag in repo["tags"] if tag.startswith(prefix)]
+
+    def single_ref(self, owner: str, name: str, tag: str) -> tuple[int, object]:
+        repo = self.repo(owner, name)
+        if repo is None or tag not in repo.get("tags", []):
+            return 404, {"message": "Not Found"}
+        return 200, self.ref_json(owner, name, tag)
+
+    def graphql(self, query: str) -> dict:
+        data = {}
+        for alias, owner, name, prefix, first, after in GRAPHQL_REPO_PATTERN.findall(query):
+            repo = self.repo(owner, name)
+            if repo is None:
+                data[alias] = None
+                continue
+            start = int(base64.b64decode(after)) if after else 0
+            # Like GitHub, names are returned relative to refPrefix
+            refs = (f"refs/tags/{tag}" for tag in repo.get("tags", []))
+            matching = [ref[len(prefix):] for ref in refs if ref.startswith(prefix)]
+            nodes = matching[start:start + int(first)]
+            end = start + len(nodes)
+            data[alias] = {
+                "refs": {
+                    "nodes": [{"name": node} for node in nodes],
+                    "pageInfo": {
+                        "hasNextPage": end < len(matching),
+                        "endCursor": base64.b64encode(str(end).encode()).decode(),
+                    },
+                }
+            }
+        errors = [
+            {"type": "NOT_FOUND", "path": [alias], "message": f"Could not resolve to a Repository with the name '{owner}/{name}'."}
+            for alias, owner, name, *_ in GRAPHQL_REPO_PATTERN.findall(query)
+            if data[alias] is None
+        ]
+        result = {"data": data}
+        if errors:
+            result["errors"] = errors
+        return result
+
+    def ls_refs(self, owner: str, name: str, request: bytes) -> tuple[int, bytes]:
+        repo = self.repo(owner, name)
+        if repo is None:
+            return 404, b"Repository not found."
+        prefixes = []
+        pos = 0
+        while pos + 4 <= len(request):
+            length = int(request[pos:pos + 4], 16)
+            payload = request[pos + 4:pos + length] if length >= 4 else b""
+            if payload.startswith(b"ref-prefix "):
+                prefixes.append(payload[len(b"ref-prefix "):].strip().decode())
+            pos += max(length, 4)
+        body = b""
+        for tag in repo.get("tags", []):
+            ref = f"refs/tags/{tag}"
+            if not prefixes or any(ref.startswith(prefix) for prefix in prefixes):
+                line = f"{fake_sha(owner, name, tag)} {ref}\n".encode()
+                body += f"{len(line) + 4:04x}".encode() + line
+        return 200, body + b"0000"
+
+    def page(self, items: list, query: dict) -> list:
+        per_page = min(int(query.get("per_page", ["30"])[0]), self.max_per_page)
+        page = int(query.get("page", ["1"])[0])
+        return items[(page - 1) * per_page:page * per_page]
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    """Routes requests to the FakeGitHub instance on the server."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle's algorithm
+    # and the client's delayed ACK add ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    @property
+    def fake(self) -> FakeGitHub:
+        return self.server.fake
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        segments = [segment for segment in parts.path.split("/") if segment]
+        rejection = self.fake.admit()
+        if rejection:
+            self.send_json(*rejection)
+            return
+
+        if len(segments) == 3 and segments[0] in ("orgs", "users") and segments[2] == "repos":
+            endpoint, handler = "repos", lambda: self.fake.list_repos(segments[0], segments[1], query)
+        elif len(segments) == 4 and segments[0] == "repos" and segments[3] == "tags":
+            endpoint, handler = "tags", lambda: self.fake.list_tags(segments[1], segments[2], query)
+        elif len(segments) >= 6 and segments[0] == "repos" and segments[3:6] == ["git", "matching-refs", "tags"]:
+            prefix = "/".join(segments[6:])
+            endpoint, handler = "matching-refs", lambda: self.fake.matching_refs(segments[1], segments[2], prefix)
+        elif len(segments) == 7 and segments[0] == "repos" and segments[3:6] == ["git", "ref", "tags"]:
+            endpoint, handler = "ref", lambda: self.fake.single_ref(segments[1], segments[2], segments[6])
+        else:
+            self.send_json(404, {"message": "Not Found"}, {})
+            return
+
+        with self.fake._lock:
+            self.fake.endpoints[endpoint] += 1
+        headers, rejection = self.fake.charge("core", self.headers.get("Authorization"))
+        if rejection:
+            self.send_json(*rejection, headers)
+            return
+        status, data = handler()
+        self.send_json(status, data, headers, conditional=True)
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        rejection = self.fake.admit()
+        if rejection:
+            self.send_json(*rejection)
+            return
+
+        if parts.path == "/graphql":
+            with self.fake._lock:
+                self.fake.endpoints["graphql"] += 1
+            if not self.headers.get("Authorization"):
+                self.send_json(401, {"message": "This endpoint requires you to be authenticated."}, {})
+                return
+            headers, rejection = self.fake.charge("graphql", self.headers.get("Authorization"))
+            if rejection:
+                self.send_json(*rejection, headers)
+                return
+            self.send_json(200, self.fake.graphql(json.loads(body)["query"]), headers)
+            return
+
+        match = re.fullmatch(r"/([^/]+)/([^/]+)\.git/git-upload-pack", parts.path)
+        if match:
+            with self.fake._lock:
+                self.fake.endpoints["git-upload-pack"] += 1
+                self.fake.requests += 1
+            status, payload = self.fake.ls_refs(match.group(1), match.group(2), body)
+            self.send_body(status, payload, {"Content-Type": "application/x-git-upload-pack-result"})
+            return
+
+        self.send_json(404, {"message": "Not Found"}, {})
+
+    def send_json(self, status: int, data, headers: dict[str, str], conditional: bool = False) -> None:
+        body = json.dumps(data).encode()
+        headers = dict(headers, **{"Content-Type": "application/json; charset=utf-8"})
+        if conditional and status == 200 and self.fake.etags:
+            etag = f'W/"{hashlib.sha256(body).hexdigest()}"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                self.fake.refund("core", self.headers.get("Authorization"))
+                if "X-RateLimit-Remaining" in headers:
+                    headers["X-RateLimit-Remaining"] = str(int(headers["X-RateLimit-Remaining"]) + 1)
+                self.send_body(304, b"", headers)
+                return
+        self.send_body(status, body, headers)
+
+    def send_body(self, status: int, body: bytes, headers: dict[str, str]) -> None:
+        if self.fake.compress and body and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers = dict(headers, **{"Content-Encoding": "gzip"})
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.fake._lock:
+            self.fake.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeGitHubHTTPServer(ThreadingHTTPServer):
+    """A ThreadingHTTPServer that can take a burst of new connections at once."""
+
+    daemon_threads = True
+    # The default listen backlog of 5 leaves a burst of concurrent clients waiting
+    # about a second on SYN retries, which would swamp the latencies being measured
+    request_queue_size = 128
+
+
+class FakeGitHubServer:
+    """Serve a FakeGitHub on localhost from a background thread."""
+
+    def __init__(self, fake: FakeGitHub, host: str = "127.0.0.1", port: int = 0):
+        self.fake = fake
+        self.server = FakeGitHubHTTPServer((host, port), FakeGitHubHandler)
+        self.server.fake = fake
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        fake.base_url = self.url
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self) -> "FakeGitHubServer":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeGitHubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fixture as a fake GitHub API")
+    parser.add_argument("fixture", type=Path, help="JSON fixture of orgs, users, repos and tags")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra random seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of requests that are slow")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="extra seconds a slow request takes")
+    parser.add_argument("--max-per-page", type=int, default=100)
+    parser.add_argument("--no-etags", action="store_true", help="never send ETags or 304s")
+    parser.add_argument("--gzip", action="store_true", help="gzip responses when the client accepts it")
+    parser.add_argument("--rate-limit", type=int, help="requests allowed per window")
+    parser.add_argument("--rate-limit-window", type=int, default=3600)
+    parser.add_argument("--secondary-limit-every", type=int, help="answer every Nth request with a secondary limit")
+    parser.add_argument("--max-concurrent", type=int, help="answer requests past this many at once with a secondary limit")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with secondary limits")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 502")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(
+        json.loads(args.fixture.read_text()),
+        latency=args.latency,
+        jitter=args.jitter,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        max_per_page=args.max_per_page,
+        etags=not args.no_etags,
+        compress=args.gzip,
+        rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window,
+        secondary_limit_every=args.secondary_limit_every,
+        max_concurrent=args.max_concurrent,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+    )
+    server = FakeGitHubServer(fake, args.host, args.port)
+    print(f"Serving {args.fixture} at {server.url}", flush=True)
+    print(f"Run: GITHUB_API_URL={server.url} GITHUB_SERVER_URL={server.url} python fetch_versions.py", flush=True)
+    server.start()
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,43 +3,282 @@
 Fetch all repos from the GitHub actions organization and their tags via the API,
 and generate a versions.txt file with the latest vINTEGER tags.
 
-No git cloning required - uses GitHub REST API only.
+No git cloning required. Tags are listed with the GitHub REST API by default,
+or fetched with batched GraphQL queries (--backend graphql) or straight from
+each repository's git server over the git protocol (--tag-source git).
 
-Repos known to have no vINTEGER tags are cached in unversioned.txt to skip
-API calls on future runs.
+Repos known to have no vINTEGER tags are cached in unversioned.json to skip API
+calls on future runs. Entries expire and are revalidated after a week, or
+sooner if the repo is pushed to; failed lookups are never cached. Each
+versioned repo's pushed_at and resolved tag are kept in repo_state.json, and
+repos with no pushes since are not looked up again. ETags for every API page
+are kept in http_cache.json so pages that have not changed cost a free 304
+response. Timings and request counts for each run are written to report.json.
+Each repo's result is appended to checkpoint.jsonl as soon as it resolves, so
+--resume can finish an interrupted run without starting again. With --partial,
+repos that could not be looked up keep their entry from the previous
+versions.txt and are listed in stale.json. A repo whose version went down or
+disappeared since the previous versions.txt is only published that way once a
+direct lookup confirms it.
+
+API requests are authenticated with GITHUB_TOKEN, or spread over a pool of
+tokens listed in GITHUB_TOKENS, each tracked against its own rate limit.
+Connection errors, timeouts and 5xx responses are retried with jittered
+exponential backoff, and a host that keeps failing trips a circuit breaker.
+Every request has connect and read timeouts, each repo's lookup has a time
+limit (--repo-timeout), and requests still running at --deadline are cut off.
+With --hedge, a GET slower than the p95 of recent requests gets a duplicate
+and whichever answers first is used. With --adaptive, the number of requests
+in flight grows until GitHub's secondary rate limit or rising latency says to
+back off, rather than staying fixed at --workers.
+
+Other orgs and users can be tracked with --org and --user. They are crawled
+concurrently and each keeps its own state files (unversioned.github.json and
+so on), while their versions share versions.txt in a block per owner.
 """
 
+import argparse
+import contextlib
+import contextvars
+import gzip
+import http.client
+import itertools
 import json
+import math
+import os
+import random
 import re
-import subprocess
 import sys
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+from urllib.parse import urlsplit
 
 
 SCRIPT_DIR = Path(__file__).parent.resolve()
 VERSIONS_FILE = SCRIPT_DIR / "versions.txt"
-UNVERSIONED_FILE = SCRIPT_DIR / "unversioned.txt"
+UNVERSIONED_FILE = SCRIPT_DIR / "unversioned.json"
+LEGACY_UNVERSIONED_FILE = SCRIPT_DIR / "unversioned.txt"
+HTTP_CACHE_FILE = SCRIPT_DIR / "http_cache.json"
+REPO_STATE_FILE = SCRIPT_DIR / "repo_state.json"
+REPORT_FILE = SCRIPT_DIR / "report.json"
+CHECKPOINT_FILE = SCRIPT_DIR / "checkpoint.jsonl"
+STALE_FILE = SCRIPT_DIR / "stale.json"
 README_FILE = SCRIPT_DIR / "README.md"
 
 # Markers for the README section
 README_START_MARKER = "<!-- VERSIONS_START -->"
 README_END_MARKER = "<!-- VERSIONS_END -->"
 ORG_NAME = "actions"
-GITHUB_API_URL = "https://api.github.com"
+# GitHub Actions sets both of these; they can also point at a local fake_github.py
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+GITHUB_SERVER_URL = os.environ.get("GITHUB_SERVER_URL", "https://github.com")
+USER_AGENT = "actions-latest"
+MAX_IDLE_CONNECTIONS = 8
+# Seconds allowed to open a connection, and to wait on each read once it is open
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 30.0
+# Seconds one repo's lookup may take, pagination and retries included
+REPO_TIMEOUT = 120.0
+# With --hedge, a GET that hasn't answered within this quantile of recent latencies
+# gets a duplicate, but hedges are kept to HEDGE_MAX_RATIO of all requests sent
+HEDGE_QUANTILE = 0.95
+HEDGE_MAX_RATIO = 0.05
+# Recent latencies the hedge delay is worked out from, and how many it needs first
+HEDGE_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+# --adaptive starts with this many requests in flight and grows while responses are
+# healthy. The limit is cut by ADAPTIVE_DECREASE on a secondary rate limit, or once
+# the median latency of the last ADAPTIVE_WINDOW requests reaches
+# ADAPTIVE_LATENCY_FACTOR times the lowest median seen
+ADAPTIVE_INITIAL = 4
+ADAPTIVE_DECREASE = 0.5
+ADAPTIVE_WINDOW = 20
+ADAPTIVE_LATENCY_FACTOR = 2.0
+# Round trips spent at the highest limit known to be safe before trying one more
+ADAPTIVE_PROBE_ROUNDS = 20
+DEFAULT_WORKERS = 8
+# Repos queued for tag lookups per worker; bounds memory however big the org is
+WORK_QUEUE_PER_WORKER = 4
+# Repositories aliased into a single GraphQL query
+GRAPHQL_BATCH_SIZE = 50
+# Unversioned cache entries are revalidated after this long, plus up to half again
+# per repo so entries cached on the same day don't all expire together
+UNVERSIONED_TTL = 7 * 24 * 60 * 60
+# --incremental probes for this many majors past the previously seen one
+PROBE_AHEAD = 2
+# Tags above this are treated as calendar versions (v202606241747), which can't be probed
+PROBE_MAX_MAJOR = 10000
+# Once a rate limit budget drops below this fraction, the rest is spread out until reset
+RATE_LIMIT_RESERVE = 0.1
+# Give up rather than sleep longer than this waiting for a rate limit to reset
+RATE_LIMIT_MAX_WAIT = 300
+# Pause used after a secondary rate limit response that has no Retry-After
+SECONDARY_RATE_LIMIT_PAUSE = 60
+# How many times a single request is retried after being rate limited
+RATE_LIMIT_RETRIES = 3
+# Connection errors, timeouts and these statuses are retried, with a random delay
+# of up to RETRY_BASE_DELAY * 2**attempt seconds (capped at RETRY_MAX_DELAY)
+RETRY_STATUSES = {500, 502, 503, 504}
+MAX_RETRIES = 4
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+# After this many failures in a row a host is treated as down: requests to it fail
+# at once, and only one is let through per cooldown to see if it has recovered
+CIRCUIT_BREAKER_THRESHOLD = 10
+CIRCUIT_BREAKER_COOLDOWN = 60.0
+# Conditional-request cache entries not requested for this long are dropped
+HTTP_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+# Bumped whenever the data stored for a URL changes shape, discarding older caches
+HTTP_CACHE_VERSION = 2
+
+
+def owner_file(path: Path, owner: str | None) -> Path:
+    """
+    Where a state file for one org or user lives. The default org keeps the plain
+    name (unversioned.json); others get their own (unversioned.github.json).
+    """
+    if owner is None or owner == ORG_NAME:
+        return path
+    return path.with_name(f"{path.stem}.{owner}{path.suffix}")
+
+
+def load_versions(owner: str | None = None) -> dict[str, str]:
+    """Load the previous run's repo -> tag mapping for one owner from versions.txt."""
+    if not VERSIONS_FILE.exists():
+        return {}
+    versions = {}
+    prefix = f"{owner or ORG_NAME}/"
+    for line in VERSIONS_FILE.read_text().splitlines():
+        line = line.strip()
+        if line.startswith(prefix) and "@" in line:
+            repo_name, tag = line[len(prefix):].rsplit("@", 1)
+            versions[repo_name] = tag
+    return versions
+
+
+def load_unversioned(owner: str | None = None) -> dict[str, dict]:
+    """
+    Load the cache of repos known to have no vINTEGER tags. Each entry records the
+    reason it was cached, when, and the repo's pushed_at at the time.
+
+    A legacy unversioned.txt is migrated with no cached_at, so its entries are
+    revalidated on the next run.
+    """
+    path = owner_file(UNVERSIONED_FILE, owner)
+    legacy_path = owner_file(LEGACY_UNVERSIONED_FILE, owner)
+    if path.exists():
+        return json.loads(path.read_text())
+    if legacy_path.exists():
+        return {
+            line.strip(): {"reason": "legacy", "cached_at": None, "pushed_at": None}
+            for line in legacy_path.read_text().splitlines()
+            if line.strip()
+        }
+    return {}
+
+
+def save_unversioned(repos: dict[str, dict], owner: str | None = None) -> None:
+    """Save the cache of repos known to have no vINTEGER tags."""
+    owner_file(UNVERSIONED_FILE, owner).write_text(json.dumps(repos, indent=2, sort_keys=True) + "\n")
+
+
+def unversioned_entry(reason: str, pushed_at: str | None) -> dict:
+    """Build an unversioned cache entry stamped with the current time."""
+    return {
+        "reason": reason,
+        "cached_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "pushed_at": pushed_at,
+    }
+
+
+def unversioned_is_fresh(repo_name: str, entry: dict, pushed_at: str | None, now: datetime) -> bool:
+    """Whether a cached unversioned entry can still be trusted without looking at the repo."""
+    if not entry.get("cached_at"):
+        return False
+    if entry.get("pushed_at") and pushed_at and entry["pushed_at"] != pushed_at:
+        return False
+    ttl = UNVERSIONED_TTL + zlib.crc32(repo_name.encode()) % (UNVERSIONED_TTL // 2)
+    age = (now - datetime.fromisoformat(entry["cached_at"])).total_seconds()
+    return age < ttl
+
+
+def load_repo_state(owner: str | None = None) -> dict[str, dict]:
+    """Load the per-repo pushed_at and resolved tag recorded by the last run."""
+    path = owner_file(REPO_STATE_FILE, owner)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
 
+def save_repo_state(state: dict[str, dict], owner: str | None = None) -> None:
+    """Save the per-repo pushed_at and resolved tag for the next run."""
+    owner_file(REPO_STATE_FILE, owner).write_text(json.dumps(state, indent=2, sort_keys=True) + "\n")
 
-def load_unversioned() -> set[str]:
-    """Load the set of repos known to have no vINTEGER tags."""
-    if not UNVERSIONED_FILE.exists():
-        return set()
-    return set(line.strip() for line in UNVERSIONED_FILE.read_text().splitlines() if line.strip())
 
+def load_checkpoint(owner: str | None = None) -> dict[str, dict]:
+    """
+    Load the per-repo results recorded by an interrupted run. A line cut short
+    when the run was killed is ignored, and that repo is looked up again.
+    """
+    path = owner_file(CHECKPOINT_FILE, owner)
+    if not path.exists():
+        return {}
+    checkpoint = {}
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            checkpoint[record["name"]] = record
+    return checkpoint
 
-def save_unversioned(repos: set[str]) -> None:
-    """Save the set of repos known to have no vINTEGER tags."""
-    with open(UNVERSIONED_FILE, "w") as f:
-        for repo_name in sorted(repos):
-            f.write(f"{repo_name}\n")
+
+def open_checkpoint(resumed: dict[str, dict], owner: str | None = None):
+    """
+    Start this run's checkpoint from the records being resumed, so being
+    interrupted again loses none of them, and open it for appending. The
+    records go to a temporary file that then replaces the old checkpoint, so a
+    crash part way through leaves one or the other intact.
+    """
+    path = owner_file(CHECKPOINT_FILE, owner)
+    partial = path.with_name(path.name + ".tmp")
+    with open(partial, "w") as f:
+        for record in resumed.values():
+            f.write(json.dumps(record, sort_keys=True) + "\n")
+    os.replace(partial, path)
+    return open(path, "a")
+
+
+def write_checkpoint(f, record: dict) -> None:
+    """Append one repo's result to the checkpoint, flushed so it survives the process being killed."""
+    f.write(json.dumps(record, sort_keys=True) + "\n")
+    f.flush()
+
+
+def stale_entry(latest_tag: str, reason: str, previous_entry: dict | None, now: datetime) -> dict:
+    """Build a stale.json entry, keeping when the repo first went stale if it already was."""
+    since = previous_entry["since"] if previous_entry else now.isoformat(timespec="seconds")
+    return {"latest_tag": latest_tag, "reason": reason, "since": since}
+
+
+def load_stale(owner: str | None = None) -> dict[str, dict]:
+    """Load the entries the last run carried forward instead of looking up."""
+    path = owner_file(STALE_FILE, owner)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_stale(stale: dict[str, dict], owner: str | None = None) -> None:
+    """Save the entries carried forward by this run, sorted by repo."""
+    owner_file(STALE_FILE, owner).write_text(json.dumps(stale, indent=2, sort_keys=True) + "\n")
 
 
 def update_readme(versions_content: str) -> None:
@@ -74,62 +313,1181 @@ def update_readme(versions_content: str) -> None:
     print(f"Updated {README_FILE} with latest versions")
 
 
-def fetch_repos(org: str) -> list[dict]:
-    """Fetch all repos for an organization using curl."""
-    repos = []
+class Response:
+    """A fully-read HTTP response."""
+
+    def __init__(self, status: int, headers: dict[str, str], body: bytes, elapsed: float = 0.0):
+        self.status = status
+        # Header names are lower-cased so lookups don't depend on server casing
+        self.headers = {name.lower(): value for name, value in headers.items()}
+        self.body = body
+        self.elapsed = elapsed
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class HTTPStats:
+    """Counters for requests made through an HTTPClient."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.bytes_received = 0
+        self.timings: list[float] = []
+
+    def summary(self) -> str:
+        if not self.requests:
+            return "HTTP: no requests made"
+        mean_ms = sum(self.timings) / len(self.timings) * 1000
+        max_ms = max(self.timings) * 1000
+        return (
+            f"HTTP: {self.requests} requests over {self.connections_opened} connections "
+            f"({self.connections_reused} reused), mean {mean_ms:.0f}ms, max {max_ms:.0f}ms"
+        )
+
+
+class HTTPClient:
+    """
+    Thread-safe HTTP client that keeps idle keep-alive connections pooled per host,
+    so repeated API calls skip the DNS lookup and TLS handshake.
+    """
+
+    def __init__(
+        self,
+        max_idle: int = MAX_IDLE_CONNECTIONS,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+    ):
+        self.max_idle = max_idle
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.stats = HTTPStats()
+        self._idle: dict[tuple[str, str, int | None], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, key) -> http.client.HTTPConnection:
+        with self._lock:
+            self.stats.connections_opened += 1
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port)
+        return http.client.HTTPConnection(host, port)
+
+    def _send(self, conn, method, path, body, headers, timeout: float | None) -> http.client.HTTPResponse:
+        """Send a request on conn, connecting first if needed, and wait for the response head."""
+        if conn.sock is None:
+            conn.timeout = self.connect_timeout if timeout is None else min(self.connect_timeout, timeout)
+            conn.connect()
+        conn.sock.settimeout(self.read_timeout if timeout is None else min(self.read_timeout, timeout))
+        conn.request(method, path, body=body, headers=headers)
+        return conn.getresponse()
+
+    def _acquire(self, key) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _release(self, key, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        body: bytes | None = None,
+        timeout: float | None = None,
+    ) -> Response:
+        """
+        Make a request, reusing a pooled connection to the same host if one is idle.
+        timeout shortens the connect and read timeouts, to keep within a deadline.
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        request_headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"}
+        request_headers.update(headers or {})
+
+        start = time.perf_counter()
+        conn, reused = self._acquire(key)
+        try:
+            try:
+                resp = self._send(conn, method, path, body, request_headers, timeout)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                # The server closed an idle keep-alive connection; retry on a fresh one
+                conn.close()
+                conn, reused = self._connect(key), False
+                resp = self._send(conn, method, path, body, request_headers, timeout)
+            data = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+        elapsed = time.perf_counter() - start
+        wire_bytes = len(data)
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+        if resp.getheader("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.bytes_received += wire_bytes
+            if reused:
+                self.stats.connections_reused += 1
+            self.stats.timings.append(elapsed)
+
+        return Response(resp.status, dict(resp.getheaders()), data, elapsed)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+_client: HTTPClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HTTPClient:
+    """Return the shared HTTPClient, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient()
+        return _client
+
+
+class APIError(Exception):
+    """An error response from GitHub for one request."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+    @classmethod
+    def from_response(cls, response: Response) -> "APIError":
+        try:
+            message = response.json()["message"]
+        except (ValueError, KeyError, TypeError):
+            message = f"HTTP {response.status}"
+        return cls(message, response.status)
+
+
+class RateLimitError(Exception):
+    """Raised when the rate limit would not reset within RATE_LIMIT_MAX_WAIT."""
+
+
+class CircuitOpenError(APIError):
+    """Raised instead of sending a request to a host that has been failing."""
+
+
+# Failures that say nothing about the request itself, so it may succeed if sent again
+TRANSIENT_ERRORS = (OSError, http.client.HTTPException)
+
+
+class Retrier:
+    """
+    Retries requests that failed for transient reasons - connection errors,
+    timeouts and 5xx responses - with exponentially growing, fully jittered
+    delays so workers that failed together don't retry together. Anything else,
+    including 4xx responses, is returned or raised straight away.
+
+    Each host has a circuit breaker. After CIRCUIT_BREAKER_THRESHOLD failed
+    attempts in a row it opens, and requests to that host raise CircuitOpenError
+    without being sent, apart from one probe per cooldown. A successful
+    response closes it again.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = MAX_RETRIES,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        threshold: int = CIRCUIT_BREAKER_THRESHOLD,
+        cooldown: float = CIRCUIT_BREAKER_COOLDOWN,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        jitter=random.uniform,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.sleep = sleep
+        self.jitter = jitter
+        self.retries = 0
+        self.retry_time = 0.0
+        self.circuit_trips = 0
+        self.fast_failures = 0
+        self._failures: dict[str, int] = {}
+        self._open_until: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _check_circuit(self, host: str) -> None:
+        with self._lock:
+            if self._failures.get(host, 0) < self.threshold:
+                return
+            now = self.clock()
+            if now >= self._open_until.get(host, 0.0):
+                # Let this request through to probe the host; the rest keep failing fast
+                self._open_until[host] = now + self.cooldown
+                return
+            self.fast_failures += 1
+        raise CircuitOpenError(f"{host} is failing, not sending requests to it until it recovers")
+
+    def _record(self, host: str, failed: bool) -> bool:
+        """Count an attempt's outcome for host's circuit breaker. Returns True if the circuit is open."""
+        with self._lock:
+            if not failed:
+                self._failures.pop(host, None)
+                return False
+            failures = self._failures[host] = self._failures.get(host, 0) + 1
+            if failures == self.threshold:
+                self.circuit_trips += 1
+                self._open_until[host] = self.clock() + self.cooldown
+            return failures >= self.threshold
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait before retry number attempt + 1."""
+        return self.jitter(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, host: str, send, deadline: float | None = None) -> Response:
+        """
+        Call send() until it returns a response that shouldn't be retried, or the
+        retries run out or would overrun deadline (a clock value). Then the last
+        response is returned, or the last error is raised as an APIError.
+        """
+        for attempt in range(self.max_retries + 1):
+            self._check_circuit(host)
+            try:
+                response = send()
+            except TRANSIENT_ERRORS as e:
+                response, error = None, e
+            else:
+                if response.status not in RETRY_STATUSES:
+                    self._record(host, failed=False)
+                    return response
+                error = None
+            if self._record(host, failed=True) or attempt == self.max_retries:
+                break
+            delay = self.backoff(attempt)
+            if response is not None and "retry-after" in response.headers:
+                delay = max(delay, float(response.headers["retry-after"]))
+            if deadline is not None and self.clock() + delay >= deadline:
+                break
+            with self._lock:
+                self.retries += 1
+                self.retry_time += delay
+            self.sleep(delay)
+        if response is not None:
+            return response
+        raise APIError(f"{type(error).__name__}: {error}") from error
+
+    def summary(self) -> str:
+        return (
+            f"Retries: {self.retries} retried requests, waited {self.retry_time:.1f}s; "
+            f"circuit breaker opened {self.circuit_trips} times, {self.fast_failures} requests failed fast"
+        )
+
+
+retrier = Retrier()
+
+
+class WireTime:
+    """
+    When the request being hedged was last put on the wire, or None while it
+    isn't, so time spent waiting on our own rate limit pacing, concurrency
+    limit or retry backoff doesn't count towards hedging it.
+    """
+
+    def __init__(self):
+        self.since: float | None = None
+        self._changed = threading.Condition()
+
+    def sent(self) -> None:
+        with self._changed:
+            self.since = time.monotonic()
+            self._changed.notify_all()
+
+    def answered(self) -> None:
+        with self._changed:
+            self.since = None
+            self._changed.notify_all()
+
+    def outlasts(self, seconds: float, future: Future) -> bool:
+        """Wait until one attempt has been on the wire for seconds (True) or future finishes (False)."""
+        with self._changed:
+            while not future.done():
+                if self.since is None:
+                    self._changed.wait()
+                    continue
+                remaining = self.since + seconds - time.monotonic()
+                if remaining <= 0:
+                    return True
+                self._changed.wait(remaining)
+            return False
+
+
+class Hedger:
+    """
+    Cuts tail latency by hedging: if a request hasn't answered within the p95 of
+    recent latencies, an identical one is sent and whichever answers first is
+    used. The other is left to finish in the background and its response is
+    dropped. Only a few percent of requests are slow enough to hedge, and at
+    most HEDGE_MAX_RATIO of them ever are, so the extra load stays small.
+
+    The p95 is compared with how long the request has been on the wire, not how
+    long it has waited to be sent. Requests run on the hedger's own threads so
+    the caller can stop waiting for a slow one. Until start() is called
+    requests are simply sent directly.
+    """
+
+    def __init__(
+        self,
+        quantile: float = HEDGE_QUANTILE,
+        max_ratio: float = HEDGE_MAX_RATIO,
+        window: int = HEDGE_WINDOW,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+    ):
+        self.quantile = quantile
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def start(self, max_threads: int) -> None:
+        """Start hedging, with enough threads for max_threads requests and their hedges."""
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="hedge")
+
+    def stop(self) -> None:
+        """Stop hedging, without waiting for hedges whose responses aren't needed."""
+        executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def delay(self) -> float | None:
+        """Seconds to wait before hedging a request, or None if it shouldn't be."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples or self.hedged >= self.requests * self.max_ratio:
+                return None
+            return percentile(self._latencies, self.quantile)
+
+    def call(self, send):
+        """
+        Call send(wire), which returns a (Response, ...) tuple and marks on wire
+        (a WireTime, or None) when each attempt is sent and answered, and hedge
+        it if it is slow. An error from one copy is only raised if the other
+        fails too.
+        """
+        executor = self._executor
+        if executor is None:
+            return send(None)
+        with self._lock:
+            self.requests += 1
+        wire = WireTime()
+        # Run in the caller's context, so its deadline still applies
+        primary = executor.submit(contextvars.copy_context().run, send, wire)
+        primary.add_done_callback(lambda future: wire.answered())
+        pending = {primary}
+        delay = self.delay()
+        if delay is not None and wire.outlasts(delay, primary):
+            with self._lock:
+                self.requests += 1
+                self.hedged += 1
+            pending.add(executor.submit(contextvars.copy_context().run, send, None))
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # Prefer a copy that succeeded; only fail once every copy has
+            winner = next((future for future in done if not future.exception()), None)
+            if winner is not None or not pending:
+                break
+        if winner is None:
+            return primary.result()
+        result = winner.result()
+        with self._lock:
+            self._latencies.append(result[0].elapsed)
+            if winner is not primary:
+                self.hedge_wins += 1
+        return result
+
+    def summary(self) -> str:
+        return f"Hedging: {self.hedged} of {self.requests} requests hedged, {self.hedge_wins} hedges answered first"
+
+
+hedger = Hedger()
+
+
+class AdaptiveConcurrency:
+    """
+    Finds how many requests can be in flight at once with AIMD (additive
+    increase, multiplicative decrease), the way TCP finds a connection's speed.
+
+    Until the first sign of trouble every healthy response raises the limit by
+    one, doubling it each round trip. A secondary rate limit (429, Retry-After,
+    or a 403 saying so), or latency climbing as the server queues requests,
+    cuts it by ADAPTIVE_DECREASE and marks the limit it happened at as too
+    high. From then on each healthy response adds 1/limit, about one more
+    request per round trip, up to the highest limit known to be safe. Going
+    over that costs a Retry-After pause, so one more is only tried after
+    ADAPTIVE_PROBE_ROUNDS round trips there. Errors and primary rate limits
+    leave the limit as it is, since sending fewer requests at once wouldn't
+    help with those.
+
+    A burst of bad responses to the same overload only cuts the limit once: it
+    isn't cut again until a limit's worth of requests have finished since.
+    Until start() is called there is no limit.
+    """
+
+    def __init__(
+        self,
+        decrease: float = ADAPTIVE_DECREASE,
+        window: int = ADAPTIVE_WINDOW,
+        latency_factor: float = ADAPTIVE_LATENCY_FACTOR,
+        probe_rounds: int = ADAPTIVE_PROBE_ROUNDS,
+    ):
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.probe_rounds = probe_rounds
+        self.maximum: int | None = None
+        self.limit = 0.0
+        self.peak_limit = 0.0
+        self.in_flight = 0
+        self.decreases = 0
+        self.throttled = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._baseline: float | None = None
+        self._since_decrease = 0
+        # The highest limit known to be safe, once one has turned out not to be
+        self._safe: int | None = None
+        self._at_safe = 0
+        self._condition = threading.Condition()
+
+    def start(self, maximum: int, initial: int = ADAPTIVE_INITIAL) -> None:
+        """Start limiting, at initial requests in flight and never more than maximum."""
+        with self._condition:
+            self.maximum = maximum
+            self.limit = self.peak_limit = float(min(initial, maximum))
+            self._latencies.clear()
+            self._baseline = None
+            # So the first sign of trouble always cuts
+            self._since_decrease = maximum
+            self._safe = None
+            self._at_safe = 0
+
+    def stop(self) -> None:
+        with self._condition:
+            self.maximum = None
+            self._condition.notify_all()
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """Wait for a free slot. Returns False if none came free within timeout seconds."""
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self.maximum is None or self.in_flight < int(self.limit), timeout
+            ):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, response: Response | None) -> None:
+        """Free a slot, adjusting the limit by how its request went; None means it raised."""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+            if self.maximum is None:
+                return
+            self._since_decrease += 1
+            if response is None or response.status >= 500:
+                return
+            if self._is_throttled(response):
+                self.throttled += 1
+                self._cut()
+                return
+            if response.status in (403, 429):
+                return
+            self._latencies.append(response.elapsed)
+            if len(self._latencies) == self._latencies.maxlen:
+                median = percentile(self._latencies, 0.5)
+                self._baseline = median if self._baseline is None else min(self._baseline, median)
+                if median >= self._baseline * self.latency_factor:
+                    self._cut()
+                    return
+            if self._safe is None:
+                self.limit += 1
+            elif self.limit < self._safe:
+                self.limit = min(self._safe, self.limit + 1 / self.limit)
+            else:
+                self._at_safe += 1
+                if self._at_safe >= self.probe_rounds * self.limit:
+                    self._safe += 1
+                    self._at_safe = 0
+            self.limit = min(self.maximum, self.limit)
+            self.peak_limit = max(self.peak_limit, self.limit)
+
+    @staticmethod
+    def _is_throttled(response: Response) -> bool:
+        if response.status not in (403, 429):
+            return False
+        return (
+            response.status == 429
+            or "retry-after" in response.headers
+            or b"secondary rate limit" in response.body.lower()
+        )
+
+    def _cut(self) -> None:
+        if self._since_decrease < self.limit:
+            return
+        self._safe = max(1, int(self.limit) - 1)
+        self._at_safe = 0
+        self.limit = max(1.0, self.limit * self.decrease)
+        self.decreases += 1
+        self._since_decrease = 0
+        # Latency measured at the old limit says nothing about the new one
+        self._latencies.clear()
+
+    def summary(self) -> str:
+        return (
+            f"Concurrency: limit {int(self.limit)} in flight (peak {int(self.peak_limit)}), "
+            f"backed off {self.decreases} times after {self.throttled} throttled responses"
+        )
+
+
+concurrency = AdaptiveConcurrency()
+
+
+class DeadlineExceeded(Exception):
+    """The run's --deadline, or a repo's --repo-timeout, passed before its lookup finished."""
+
+
+# The deadline for requests made in the current context: (time.monotonic() value, reason)
+_deadline: contextvars.ContextVar[tuple[float, str] | None] = contextvars.ContextVar("deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline_scope(expires: float | None, reason: str):
+    """
+    Requests made in this context inside the block must finish by expires, a
+    time.monotonic() value. Their timeouts are cut short to fit, and once it
+    passes they raise DeadlineExceeded(reason). Nested scopes keep the earliest.
+    """
+    outer = _deadline.get()
+    if expires is None or (outer is not None and outer[0] <= expires):
+        yield
+        return
+    token = _deadline.set((expires, reason))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> float | None:
+    """Seconds until the current deadline, or None without one. Raises DeadlineExceeded once it has passed."""
+    current = _deadline.get()
+    if current is None:
+        return None
+    remaining = current[0] - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded(current[1])
+    return remaining
+
+
+def send_request(
+    method: str,
+    url: str,
+    headers: dict[str, str] | None = None,
+    body: bytes | None = None,
+    wire: WireTime | None = None,
+) -> Response:
+    """
+    Send a request over the shared client, retrying transient failures within the
+    current deadline, and holding a slot from the concurrency limit while it is sent.
+    Each attempt is marked on wire as it is sent and answered.
+    """
+    current = _deadline.get()
+
+    def attempt() -> Response:
+        # Waiting for a slot can't run past the deadline either: time_left() raises once it passes
+        while not concurrency.acquire(time_left()):
+            pass
+        response = None
+        if wire:
+            wire.sent()
+        try:
+            response = get_client().request(method, url, headers=headers, body=body, timeout=time_left())
+            return response
+        finally:
+            if wire:
+                wire.answered()
+            concurrency.release(response)
+
+    try:
+        return retrier.call(urlsplit(url).hostname, attempt, deadline=current and current[0])
+    except APIError:
+        # A request cut short by the deadline times out; report the deadline instead
+        time_left()
+        raise
+
+
+class RateLimitBudget:
+    """What the X-RateLimit headers last told us about one rate limit resource."""
+
+    def __init__(self):
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset: float = 0.0
+        self.next_slot: float = 0.0
+
+
+class RateLimitScheduler:
+    """
+    Paces API requests from every worker using the X-RateLimit-* headers.
+
+    Each token in the pool has its own budget per resource ("core", "graphql"),
+    and every request goes out on the ready token with the most budget left, so
+    the pool's combined limit is used evenly. Requests run at full speed while
+    plenty of budget is left. Once a token's remaining budget for a resource
+    drops below RATE_LIMIT_RESERVE of its limit, the rest is spread evenly over
+    the time until it resets; an exhausted token is skipped until then. A
+    secondary rate limit (Retry-After, or a 403/429 saying so) pauses every
+    request on the token that hit it.
+    """
+
+    def __init__(
+        self,
+        max_wait: float = RATE_LIMIT_MAX_WAIT,
+        clock=time.time,
+        sleep=time.sleep,
+        tokens: Iterable[str | None] = (),
+    ):
+        self.max_wait = max_wait
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens: list[str | None] = list(tokens) or [None]
+        self.budgets: dict[tuple[str | None, str], RateLimitBudget] = {}
+        self.paused_until: dict[str | None, float] = {}
+        self.requests: Counter[str | None] = Counter()
+        self.waits = 0
+        self.wait_time = 0.0
+        self.limited_responses = 0
+        self._lock = threading.Lock()
+
+    def use_tokens(self, tokens: Iterable[str | None]) -> None:
+        """Replace the token pool; None (or an empty pool) sends requests unauthenticated."""
+        with self._lock:
+            self.tokens = list(tokens) or [None]
+
+    def _spacing(self, budget: RateLimitBudget, now: float) -> float:
+        """Seconds to leave between requests so the budget lasts until it resets."""
+        if budget.remaining is None or budget.reset <= now or not budget.limit:
+            return 0.0
+        if budget.remaining >= budget.limit * RATE_LIMIT_RESERVE:
+            return 0.0
+        return (budget.reset - now) / max(budget.remaining, 1)
+
+    def _delay(self, token: str | None, budget: RateLimitBudget, now: float) -> float:
+        delay = max(0.0, self.paused_until.get(token, 0.0) - now, budget.next_slot - now)
+        if budget.remaining is not None and budget.remaining <= 0 and budget.reset > now:
+            delay = max(delay, budget.reset - now + 1)
+        return delay
+
+    def acquire(self, resource: str = "core") -> str | None:
+        """
+        Block until a request against resource may be sent, returning the token
+        to send it with. Raises DeadlineExceeded rather than wait past the
+        current deadline.
+        """
+        while True:
+            with self._lock:
+                now = self.clock()
+                candidates = []
+                for index, token in enumerate(self.tokens):
+                    budget = self.budgets.setdefault((token, resource), RateLimitBudget())
+                    # A token we haven't heard back about yet counts as having its whole budget
+                    remaining = math.inf if budget.remaining is None else budget.remaining
+                    candidates.append((self._delay(token, budget, now), -remaining, index))
+                delay, _, index = min(candidates)
+                if delay <= 0:
+                    token = self.tokens[index]
+                    budget = self.budgets[(token, resource)]
+                    budget.next_slot = now + self._spacing(budget, now)
+                    if budget.remaining is not None:
+                        budget.remaining -= 1
+                    self.requests[token] += 1
+                    return token
+            if delay > self.max_wait:
+                raise RateLimitError(f"{resource} rate limit will not reset for {delay:.0f}s")
+            remaining = time_left()
+            if remaining is not None and delay >= remaining:
+                raise DeadlineExceeded(_deadline.get()[1])
+            with self._lock:
+                self.waits += 1
+                self.wait_time += delay
+            self.sleep(delay)
+
+    def update(self, resource: str, response: Response, token: str | None = None) -> bool:
+        """Record the rate limit headers of a response sent with token. Returns True if it was rate limited."""
+        headers = response.headers
+        with self._lock:
+            now = self.clock()
+            budget = self.budgets.setdefault((token, resource), RateLimitBudget())
+            if "x-ratelimit-remaining" in headers:
+                budget.remaining = int(headers["x-ratelimit-remaining"])
+            if "x-ratelimit-limit" in headers:
+                budget.limit = int(headers["x-ratelimit-limit"])
+            if "x-ratelimit-reset" in headers:
+                budget.reset = float(headers["x-ratelimit-reset"])
+
+            if response.status not in (403, 429):
+                return False
+            if "retry-after" in headers:
+                pause = now + float(headers["retry-after"])
+            elif budget.remaining == 0:
+                pause = 0.0  # Primary limit exhausted: acquire() skips this token until the reset
+            elif b"secondary rate limit" in response.body.lower():
+                pause = now + SECONDARY_RATE_LIMIT_PAUSE
+            else:
+                return False
+            self.paused_until[token] = max(self.paused_until.get(token, 0.0), pause)
+            self.limited_responses += 1
+            return True
+
+    def summary(self) -> str:
+        summary = (
+            f"Rate limit: {self.limited_responses} limited responses, "
+            f"waited {self.waits} times for {self.wait_time:.1f}s"
+        )
+        if len(self.tokens) > 1:
+            # Tokens are secrets, so they're identified by their position in the pool
+            spread = ", ".join(f"#{index + 1}: {self.requests[token]}" for index, token in enumerate(self.tokens))
+            summary += f", requests per token {spread}"
+        return summary
+
+
+rate_limiter = RateLimitScheduler()
+
+
+def github_tokens() -> list[str]:
+    """
+    The API tokens to spread requests over: GITHUB_TOKENS (separated by commas
+    or whitespace) followed by GITHUB_TOKEN, without duplicates.
+    """
+    tokens = os.environ.get("GITHUB_TOKENS", "").replace(",", " ").split()
+    tokens.append(os.environ.get("GITHUB_TOKEN", "").strip())
+    return [token for token in dict.fromkeys(tokens) if token]
+
+
+def api_request(
+    method: str, url: str, headers: dict[str, str] | None = None, body: bytes | None = None
+) -> Response:
+    """
+    Make a GitHub API request through the shared connection pool and rate limit
+    scheduler, authenticated with whichever token the scheduler picks, retrying
+    requests that were rejected by a rate limit or failed transiently. Slow GETs
+    may be hedged.
+    """
+    resource = "graphql" if url.endswith("/graphql") else "core"
+
+    def send(wire: WireTime | None = None) -> tuple[Response, bool]:
+        # A hedged copy comes through here too, so it is paced and counted like any request
+        token = rate_limiter.acquire(resource)
+        request_headers = dict(headers or {})
+        if token:
+            request_headers["Authorization"] = f"Bearer {token}"
+        response = send_request(method, url, headers=request_headers, body=body, wire=wire)
+        return response, rate_limiter.update(resource, response, token)
+
+    for _ in range(RATE_LIMIT_RETRIES):
+        # Only reads are safe to send twice
+        response, limited = hedger.call(send) if method == "GET" else send()
+        if not limited:
+            return response
+    return response
+
+
+def api_get(url: str, headers: dict[str, str] | None = None) -> Response:
+    """GET a GitHub API URL."""
+    request_headers = {"Accept": "application/vnd.github+json"}
+    request_headers.update(headers or {})
+    return api_request("GET", url, headers=request_headers)
+
+
+class ConditionalCache:
+    """
+    ETag / Last-Modified validators for API pages, stored alongside the data that
+    was extracted from each page. Unchanged pages come back as 304 Not Modified,
+    which GitHub does not count against the rate limit, and reuse the stored data.
+    """
+
+    def __init__(self):
+        self.entries: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def load(self, path: Path) -> None:
+        if path.exists():
+            cache = json.loads(path.read_text())
+            # A 304 returns the stored data as-is, so data in an old shape can't be used
+            if cache.get("version") == HTTP_CACHE_VERSION:
+                self.entries = cache["entries"]
+
+    def save(self, path: Path) -> None:
+        cutoff = time.time() - HTTP_CACHE_MAX_AGE
+        with self._lock:
+            entries = {url: entry for url, entry in self.entries.items() if entry["seen"] >= cutoff}
+        path.write_text(json.dumps({"version": HTTP_CACHE_VERSION, "entries": entries}, sort_keys=True) + "\n")
+
+    def get(self, url: str, extract):
+        """
+        GET url, sending the stored validators if we have any. Successful responses
+        are passed to extract(response), and its result is cached and returned.
+        Error responses raise APIError and are never cached.
+        """
+        with self._lock:
+            entry = self.entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = api_get(url, headers=headers)
+        if response.status == 304 and entry:
+            with self._lock:
+                self.hits += 1
+                entry["seen"] = int(time.time())
+            return entry["data"]
+
+        if response.status != 200:
+            raise APIError.from_response(response)
+        data = extract(response)
+
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        with self._lock:
+            self.misses += 1
+            if etag or last_modified:
+                self.entries[url] = {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "seen": int(time.time()),
+                    "data": data,
+                }
+        return data
+
+    def get_json(self, url: str, extract=None):
+        """GET a JSON page, optionally reducing it with extract() before caching."""
+
+        def extract_json(response):
+            data = response.json()
+            if extract:
+                data = extract(data)
+            return data
+
+        return self.get(url, extract_json)
+
+    def summary(self) -> str:
+        return f"Conditional requests: {self.hits} not modified, {self.misses} changed"
+
+
+http_cache = ConditionalCache()
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    """Nearest-rank percentile of values, or None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+class RunReport:
+    """
+    Phase timings and counters for a single run, written to report.json so the
+    cost of each run can be tracked and regressions spotted. Phases are timed
+    with a wall clock. Repos are listed while tags are fetched, so list_repos
+    overlaps fetch_tags, and parse_tags is summed across workers.
+    """
+
+    # Counters read from the HTTP client, conditional cache, rate limiter, retrier, hedger and
+    # concurrency limit
+    SOURCES = {
+        "http": ("stats", ["requests", "connections_opened", "connections_reused", "bytes_received"]),
+        "conditional_requests": ("cache", ["hits", "misses"]),
+        "rate_limit": ("limiter", ["limited_responses", "waits", "wait_time"]),
+        "retries": ("retrier", ["retries", "retry_time", "circuit_trips", "fast_failures"]),
+        "hedging": ("hedger", ["hedged", "hedge_wins"]),
+        "concurrency": ("concurrency", ["decreases", "throttled"]),
+    }
+    # Repo counts every report includes, even when they are zero
+    REPO_COUNTS = [
+        "listed", "fetched", "unversioned_skipped", "unchanged_reused", "resumed", "versioned", "unversioned",
+        "failed", "carried_forward", "regressions_confirmed", "regressions_rejected",
+    ]
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.reset()
+
+    def reset(
+        self,
+        stats: HTTPStats | None = None,
+        cache: ConditionalCache | None = None,
+        limiter: RateLimitScheduler | None = None,
+        retrier: Retrier | None = None,
+        hedger: Hedger | None = None,
+        concurrency: AdaptiveConcurrency | None = None,
+    ) -> None:
+        """Start a new run, counting only what happens from now on."""
+        self.started_at = datetime.now(timezone.utc)
+        self.phases: dict[str, float] = {}
+        self.counts: dict[str, int] = dict.fromkeys(self.REPO_COUNTS, 0)
+        self.stats = stats or HTTPStats()
+        self.cache = cache or ConditionalCache()
+        self.limiter = limiter or RateLimitScheduler()
+        self.retrier = retrier or Retrier()
+        self.hedger = hedger or Hedger()
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self._start = self.clock()
+        self._lock = threading.Lock()
+        # These objects outlive a run, so remember where this one began
+        self._baseline = self._counters()
+        self._timings_start = len(self.stats.timings)
+
+    def _counters(self) -> dict[str, dict[str, float]]:
+        return {
+            section: {name: getattr(getattr(self, source), name) for name in names}
+            for section, (source, names) in self.SOURCES.items()
+        }
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.add_time(name, self.clock() - start)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def to_dict(self) -> dict:
+        timings = self.stats.timings[self._timings_start:]
+        latency = {}
+        for fraction in (0.5, 0.95, 0.99):
+            value = percentile(timings, fraction)
+            latency[f"p{round(fraction * 100)}_ms"] = None if value is None else round(value * 1000, 1)
+        data = {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "duration": round(self.clock() - self._start, 3),
+        }
+        with self._lock:
+            data["phases"] = {name: round(seconds, 3) for name, seconds in self.phases.items()}
+            data["repos"] = dict(sorted(self.counts.items()))
+        for section, counters in self._counters().items():
+            data[section] = {
+                name: round(value - self._baseline[section][name], 3) for name, value in counters.items()
+            }
+        data["latency"] = latency
+        return data
+
+    def save(self, path: Path) -> None:
+        path.write_text(json.dumps(self.to_dict(), indent=2) + "\n")
+
+
+run_report = RunReport()
+
+
+def graphql_query(query: str) -> dict:
+    """
+    POST a query to the GraphQL API, which requires a token in the pool. Raises
+    APIError if the request fails or doesn't come back with a GraphQL result.
+    """
+    if not any(rate_limiter.tokens):
+        raise RuntimeError("The GraphQL API requires a GITHUB_TOKEN or GITHUB_TOKENS environment variable")
+    response = api_request(
+        "POST",
+        f"{GITHUB_API_URL}/graphql",
+        headers={"Content-Type": "application/json"},
+        body=json.dumps({"query": query}).encode(),
+    )
+    if response.status != 200:
+        raise APIError.from_response(response)
+    try:
+        result = response.json()
+    except ValueError:
+        raise APIError.from_response(response) from None
+    if not isinstance(result, dict) or ("data" not in result and "errors" not in result):
+        raise APIError.from_response(response)
+    return result
+
+
+def build_tags_query(org: str, cursors: dict[str, str | None]) -> tuple[str, dict[str, str]]:
+    """
+    Build a query that aliases one repository() lookup per repo, asking only for
+    the names of refs under refs/tags/v. Returns the query and an alias -> repo map.
+    """
+    aliases = {}
+    fields = []
+    for i, (repo_name, cursor) in enumerate(cursors.items()):
+        alias = f"r{i}"
+        aliases[alias] = repo_name
+        after = f", after: {json.dumps(cursor)}" if cursor else ""
+        fields.append(
+            f"  {alias}: repository(owner: {json.dumps(org)}, name: {json.dumps(repo_name)}) {{\n"
+            f"    refs(refPrefix: \"refs/tags/v\", first: 100{after}) {{\n"
+            f"      nodes {{ name }}\n"
+            f"      pageInfo {{ hasNextPage endCursor }}\n"
+            f"    }}\n"
+            f"  }}"
+        )
+    return "query {\n" + "\n".join(fields) + "\n}", aliases
+
+
+def fetch_tags_graphql(org: str, repo_names: list[str]) -> dict[str, list[str] | APIError]:
+    """
+    Fetch the v* tags of many repositories using batched GraphQL queries.
+
+    Repos with more than 100 matching tags are paged in later batches. A repo
+    whose lookup failed maps to an APIError instead of a tag list. That
+    includes every repo left without a result by an error for the whole query,
+    such as a timeout, which GitHub answers with a 200 and "data": null.
+    """
+    tags: dict[str, list[str] | APIError] = {repo_name: [] for repo_name in repo_names}
+    pending: dict[str, str | None] = {repo_name: None for repo_name in repo_names}
+
+    while pending:
+        batch = dict(list(pending.items())[:GRAPHQL_BATCH_SIZE])
+        query, aliases = build_tags_query(org, batch)
+        result = graphql_query(query)
+        data = result.get("data") or {}
+        query_errors = []
+
+        for error in result.get("errors") or []:
+            repo_name = aliases.get((error.get("path") or [None])[0])
+            if repo_name is None:
+                query_errors.append(error.get("message", "GraphQL error"))
+                continue
+            status = 404 if error.get("type") == "NOT_FOUND" else None
+            tags[repo_name] = APIError(error.get("message", "GraphQL error"), status)
+
+        for alias, repo_name in aliases.items():
+            del pending[repo_name]
+            if isinstance(tags[repo_name], APIError):
+                continue
+            repo = data.get(alias)
+            if repo is None:
+                # No result and no error of its own says nothing about the repo's tags
+                tags[repo_name] = APIError("; ".join(query_errors) or "GraphQL returned no result for this repo")
+                continue
+            if not repo.get("refs"):
+                continue
+            refs = repo["refs"]
+            # Names are relative to refPrefix, so "refs/tags/v7" comes back as "7"
+            tags[repo_name].extend("v" + node["name"] for node in refs["nodes"])
+            if refs["pageInfo"]["hasNextPage"]:
+                pending[repo_name] = refs["pageInfo"]["endCursor"]
+
+    return tags
+
+
+class RepoRecord(NamedTuple):
+    """
+    The fields of a GitHub repo object that are used. Repo objects run to dozens of
+    URLs plus owner and license blobs, so only these are kept, in memory and in the cache.
+    """
+
+    name: str
+    id: int | None = None
+    archived: bool = False
+    fork: bool = False
+    pushed_at: str | None = None
+
+    @classmethod
+    def from_json(cls, repo: dict) -> "RepoRecord":
+        return cls(
+            repo["name"], repo.get("id"), repo.get("archived", False), repo.get("fork", False), repo.get("pushed_at")
+        )
+
+
+def compact_repos(page: list[dict]) -> list[list]:
+    """Project a page of repo objects down to RepoRecord rows, as stored in the cache."""
+    return [list(RepoRecord.from_json(repo)) for repo in page]
+
+
+def fetch_repos(owner: str, kind: str = "orgs") -> Iterator[RepoRecord]:
+    """
+    Yield all repos for an organization (or, with kind="users", a user) using the
+    GitHub API, a page at a time, so callers can start on the first page while
+    later ones are still to come. Raises APIError on failure.
+    """
     page = 1
     per_page = 100
 
     while True:
-        url = f"{GITHUB_API_URL}/orgs/{org}/repos?per_page={per_page}&page={page}"
-        result = subprocess.run(
-            ["curl", "-s", "-H", "Accept: application/vnd.github+json", url],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-
-        page_repos = json.loads(result.stdout)
+        url = f"{GITHUB_API_URL}/{kind}/{owner}/repos?per_page={per_page}&page={page}"
+        with run_report.phase("list_repos"):
+            page_repos = http_cache.get_json(url, compact_repos)
 
         if not page_repos:
             break
 
-        repos.extend(page_repos)
+        for row in page_repos:
+            yield RepoRecord(*row)
 
         if len(page_repos) < per_page:
             break
 
         page += 1
 
-    return repos
-
 
 def fetch_tags(org: str, repo_name: str) -> list[str]:
-    """Fetch all tags for a repository using the GitHub API."""
+    """Fetch all tags for a repository using the GitHub API. Raises APIError on failure."""
     tags = []
     page = 1
     per_page = 100
 
     while True:
         url = f"{GITHUB_API_URL}/repos/{org}/{repo_name}/tags?per_page={per_page}&page={page}"
-        result = subprocess.run(
-            ["curl", "-s", "-H", "Accept: application/vnd.github+json", url],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-
-        page_tags = json.loads(result.stdout)
-
-        # Handle error responses (e.g., rate limiting)
-        if isinstance(page_tags, dict) and "message" in page_tags:
-            print(f"  API error for {repo_name}: {page_tags['message']}", file=sys.stderr)
-            break
+        page_tags = http_cache.get_json(url, extract=lambda page: [tag["name"] for tag in page])
 
         if not page_tags:
             break
 
-        tags.extend(tag["name"] for tag in page_tags)
+        tags.extend(page_tags)
 
         if len(page_tags) < per_page:
             break
@@ -139,6 +1497,141 @@ def fetch_tags(org: str, repo_name: str) -> list[str]:
     return tags
 
 
+# Matches the ref of a vINTEGER tag in a raw matching-refs response body
+MATCHING_REF_PATTERN = re.compile(rb'"ref"\s*:\s*"refs/tags/(v\d+)"')
+
+
+def fetch_matching_tags(org: str, repo_name: str) -> list[str]:
+    """
+    Fetch only the vINTEGER tags of a repository, using the git matching-refs
+    endpoint to have the server filter to refs under refs/tags/v.
+
+    The response body is scanned for ref names rather than decoded, so refs
+    like v1.2.3 are discarded without ever being built into objects.
+    """
+    url = f"{GITHUB_API_URL}/repos/{org}/{repo_name}/git/matching-refs/tags/v"
+    return http_cache.get(
+        url,
+        lambda response: [name.decode() for name in MATCHING_REF_PATTERN.findall(response.body)],
+    )
+
+
+def pkt_line(data: bytes) -> bytes:
+    """Frame data as a git pkt-line: a 4 digit hex length (including itself) then the payload."""
+    return f"{len(data) + 4:04x}".encode() + data
+
+
+def parse_pkt_lines(data: bytes) -> Iterator[bytes | None]:
+    """Split a pkt-line stream into payloads, yielding None for flush/delim packets."""
+    pos = 0
+    while pos + 4 <= len(data):
+        length = int(data[pos:pos + 4], 16)
+        if length < 4:
+            yield None
+            pos += 4
+            continue
+        yield data[pos + 4:pos + length]
+        pos += length
+
+
+def fetch_tags_git(org: str, repo_name: str) -> list[str]:
+    """
+    Fetch a repository's v* tags over git smart HTTP, using the protocol v2
+    ls-refs command - the equivalent of `git ls-remote --tags` without spawning git.
+
+    This is a single request per repo and does not use the REST API rate limit.
+    Raises APIError on failure.
+    """
+    url = f"{GITHUB_SERVER_URL}/{org}/{repo_name}.git/git-upload-pack"
+    body = (
+        pkt_line(b"command=ls-refs\n")
+        + pkt_line(f"agent={USER_AGENT}\n".encode())
+        + b"0001"
+        + pkt_line(b"ref-prefix refs/tags/v\n")
+        + b"0000"
+    )
+    response = send_request(
+        "POST",
+        url,
+        headers={
+            "Git-Protocol": "version=2",
+            "Content-Type": "application/x-git-upload-pack-request",
+            "Accept": "application/x-git-upload-pack-result",
+        },
+        body=body,
+    )
+    if response.status != 200:
+        raise APIError(f"HTTP {response.status}", response.status)
+
+    tags = []
+    for line in parse_pkt_lines(response.body):
+        if line is None:
+            break
+        if line.startswith(b"ERR "):
+            raise APIError(line[4:].decode().strip())
+        # Each ref is "<oid> <refname>", optionally followed by attributes
+        fields = line.rstrip(b"\n").split(b" ")
+        if len(fields) >= 2 and fields[1].startswith(b"refs/tags/"):
+            tags.append(fields[1][len(b"refs/tags/"):].decode())
+    return tags
+
+
+def tag_exists(org: str, repo_name: str, tag: str) -> bool:
+    """Check for a single tag with the git ref endpoint; unexpected errors count as a hit."""
+    url = f"{GITHUB_API_URL}/repos/{org}/{repo_name}/git/ref/tags/{tag}"
+    response = api_get(url)
+    if response.status == 404:
+        return False
+    if response.status != 200:
+        print(f"  API error probing {repo_name}@{tag}: HTTP {response.status}", file=sys.stderr)
+    return True
+
+
+def probe_next_major(org: str, repo_name: str, previous_tag: str) -> bool:
+    """
+    Return True if a major version after previous_tag may exist. Only the next
+    PROBE_AHEAD majors are looked up, so an unchanged repo costs a request or two.
+    """
+    match = re.match(r"^v(\d+)$", previous_tag)
+    if not match or int(match.group(1)) >= PROBE_MAX_MAJOR:
+        return True
+    major = int(match.group(1))
+    return any(tag_exists(org, repo_name, f"v{major + step}") for step in range(1, PROBE_AHEAD + 1))
+
+
+def find_regressions(previous: dict[str, str], latest: dict[str, str]) -> list[str]:
+    """Repos whose major version went down since the previous snapshot, or that lost it altogether."""
+    return sorted(
+        repo_name
+        for repo_name, previous_tag in previous.items()
+        if repo_name not in latest or int(latest[repo_name][1:]) < int(previous_tag[1:])
+    )
+
+
+def confirm_regression(org: str, repo_name: str, previous_tag: str) -> bool:
+    """
+    Check that previous_tag really is gone before accepting a result without it.
+    The ref is looked up directly, so a truncated or stale tag listing can't
+    confirm it; errors and rate limits leave the regression unconfirmed.
+    """
+    url = f"{GITHUB_API_URL}/repos/{org}/{repo_name}/git/ref/tags/{previous_tag}"
+    try:
+        response = api_get(url)
+    except (APIError, RateLimitError, DeadlineExceeded):
+        return False
+    # 404: the tag or repo is gone, 409: the repo is now empty, 301: it was renamed or transferred
+    return response.status in (301, 404, 409)
+
+
+def fetch_repo_tags(org: str, repo_name: str, source: str = "tags") -> list[str]:
+    """Fetch a repository's tags using the named tag source."""
+    if source == "matching-refs":
+        return fetch_matching_tags(org, repo_name)
+    if source == "git":
+        return fetch_tags_git(org, repo_name)
+    return fetch_tags(org, repo_name)
+
+
 def get_latest_version_tag(tags: list[str]) -> str | None:
     """Get the latest vINTEGER tag from a list of tags."""
     # Filter to vINTEGER tags (e.g., v1, v2, v10)
@@ -158,61 +1651,534 @@ def get_latest_version_tag(tags: list[str]) -> str | None:
     return version_tags[0][1]
 
 
-def main():
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--org",
+        action="append",
+        dest="orgs",
+        metavar="ORG",
+        help=f"organization to track; repeat for several, which are crawled concurrently (default {ORG_NAME})",
+    )
+    parser.add_argument(
+        "--user",
+        action="append",
+        dest="users",
+        metavar="USER",
+        help="user account to track, alongside any organizations; repeatable",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"number of repos to fetch tags for concurrently (default {DEFAULT_WORKERS}, 1 for sequential)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["rest", "graphql"],
+        default="rest",
+        help="fetch tags with one REST call per repo page, or in batched GraphQL queries "
+        "(graphql requires a token)",
+    )
+    parser.add_argument(
+        "--tag-source",
+        choices=["tags", "matching-refs", "git"],
+        default="tags",
+        help="how to find tags: page through every tag, ask the REST API for refs "
+        "under refs/tags/v only, or ask the git server directly (no REST rate limit)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="start from the previous versions.txt and only list a repo's tags when "
+        "a probe finds a newer major version",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="ignore stored per-repo state and look up tags even for repos with no new pushes",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=f"reuse the results an interrupted run recorded in {CHECKPOINT_FILE.name} "
+        "and only look up the remaining repos",
+    )
+    parser.add_argument(
+        "--partial",
+        action="store_true",
+        help="when a repo's lookup fails or the rate limit runs out, keep its entry from the "
+        f"previous versions.txt and list it in {STALE_FILE.name} instead of dropping it",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="stop looking up tags this many seconds into the run, cutting off requests in flight, "
+        "and carry the remaining repos forward (implies --partial)",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help=f"start with {ADAPTIVE_INITIAL} requests in flight and adjust that as the run goes, "
+        "speeding up while responses are healthy and backing off on secondary rate limits "
+        "or rising latency, up to --workers",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help=f"send a second copy of any GET slower than the p{round(HEDGE_QUANTILE * 100)} of recent requests "
+        f"and use whichever answers first, for at most {round(HEDGE_MAX_RATIO * 100)}%% extra requests",
+    )
+    parser.add_argument(
+        "--repo-timeout",
+        type=float,
+        default=REPO_TIMEOUT,
+        metavar="SECONDS",
+        help=f"give up on a repo whose lookup takes longer than this (default {REPO_TIMEOUT:g})",
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=CONNECT_TIMEOUT,
+        metavar="SECONDS",
+        help=f"timeout for opening each connection (default {CONNECT_TIMEOUT:g})",
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=READ_TIMEOUT,
+        metavar="SECONDS",
+        help=f"timeout for each read from a connection (default {READ_TIMEOUT:g})",
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    args.owners = [(org, "orgs") for org in args.orgs or []] + [(user, "users") for user in args.users or []]
+    if not args.owners:
+        args.owners = [(ORG_NAME, "orgs")]
+    names = [owner.lower() for owner, _ in args.owners]
+    if len(set(names)) < len(names):
+        parser.error("each org or user can only be given once")
+    if args.deadline is not None:
+        if args.deadline < 0:
+            parser.error("--deadline must not be negative")
+        args.partial = True
+    for option in ("repo_timeout", "connect_timeout", "read_timeout"):
+        if getattr(args, option) <= 0:
+            parser.error(f"--{option.replace('_', '-')} must be positive")
+    if args.backend == "graphql" and not github_tokens():
+        parser.error("--backend graphql requires a GITHUB_TOKEN or GITHUB_TOKENS environment variable")
+    if args.backend == "graphql" and args.incremental:
+        parser.error("--incremental only applies to the rest backend")
+    return args
+
+
+def resolve_latest_tag(
+    org: str, repo_name: str, source: str = "tags", previous_tag: str | None = None
+) -> str | None:
+    """
+    Find a repo's latest vINTEGER tag. With a previous_tag, probe for newer majors
+    first and only list tags when a probe hits.
+    """
+    if previous_tag and not probe_next_major(org, repo_name, previous_tag):
+        return previous_tag
+    tags = fetch_repo_tags(org, repo_name, source)
+    with run_report.phase("parse_tags"):
+        return get_latest_version_tag(tags)
+
+
+def bounded_map(executor: Executor, fn, items: Iterable, limit: int) -> Iterator[tuple]:
+    """
+    Like executor.map(), but pull items lazily and keep at most limit of them
+    queued or running, yielding (item, result) in the order the items came in.
+    If items raises part way, the results for the items already pulled are
+    yielded before the error is passed on.
+    """
+    items = iter(items)
+    pending = deque()
+    try:
+        while True:
+            try:
+                item = next(items)
+            except StopIteration:
+                break
+            except Exception:
+                while pending:
+                    item, future = pending.popleft()
+                    yield item, future.result()
+                raise
+            pending.append((item, executor.submit(fn, item)))
+            if len(pending) >= limit:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def iter_latest_tags(
+    args: argparse.Namespace,
+    owner: str,
+    repo_names: Iterable[str],
+    previous: dict[str, str],
+    executor: Executor,
+    deadline: float | None = None,
+) -> Iterator[tuple[str, str | None, Exception | None]]:
+    """
+    Yield (repo_name, latest_tag, error) for each of owner's repos, in the order
+    given, using the selected backend. error is set when the repo's tags could not
+    be fetched. repo_names is consumed lazily, so it can be fed straight from the
+    repo listing. REST lookups run on executor, which can be shared between owners.
+
+    Each lookup, or GraphQL batch, is given args.repo_timeout seconds, and none
+    may run past the run's deadline (a time.monotonic() value); requests still in
+    flight then are cut off. A lookup that runs out of time is reported as a
+    DeadlineExceeded error. With args.partial, running out of rate limit is also
+    reported per repo instead of ending the run.
+    """
+
+    def deadline_error():
+        if deadline is not None and time.monotonic() >= deadline:
+            return DeadlineExceeded("deadline passed before this repo was looked up")
+        return None
+
+    def lookup_scope():
+        timeout = f"lookup took longer than {args.repo_timeout:g}s"
+        scope = contextlib.ExitStack()
+        scope.enter_context(deadline_scope(deadline, "deadline passed during this lookup"))
+        scope.enter_context(deadline_scope(time.monotonic() + args.repo_timeout, timeout))
+        return scope
+
+    if args.backend == "graphql":
+        print(f"Fetching tags for {owner} via GraphQL...")
+        # One batch at a time, so each batch's results can be checkpointed
+        repo_names = iter(repo_names)
+        listing_error = None
+        while listing_error is None:
+            batch = []
+            try:
+                for repo_name in itertools.islice(repo_names, GRAPHQL_BATCH_SIZE):
+                    batch.append(repo_name)
+            except Exception as e:
+                # Still look up the repos listed before the listing failed
+                listing_error = e
+            if not batch:
+                break
+            error = deadline_error()
+            if error is None:
+                try:
+                    with lookup_scope():
+                        tags_by_repo = fetch_tags_graphql(owner, batch)
+                except (APIError, DeadlineExceeded) as e:
+                    error = e
+                except RateLimitError as e:
+                    if not args.partial:
+                        raise
+                    error = e
+            for repo_name in batch:
+                tags = error or tags_by_repo[repo_name]
+                if isinstance(tags, Exception):
+                    yield repo_name, None, tags
+                else:
+                    with run_report.phase("parse_tags"):
+                        latest_tag = get_latest_version_tag(tags)
+                    yield repo_name, latest_tag, None
+        if listing_error is not None:
+            raise listing_error
+        return
+
+    def resolve(repo_name):
+        error = deadline_error()
+        if error:
+            return None, error
+        try:
+            with lookup_scope():
+                return resolve_latest_tag(owner, repo_name, args.tag_source, previous.get(repo_name)), None
+        except (APIError, DeadlineExceeded) as e:
+            return None, e
+        except RateLimitError as e:
+            if not args.partial:
+                raise
+            return None, e
+
+    print(f"Fetching tags for {owner} with {args.workers} workers...")
+    # Results come back in listing order, so output stays deterministic
+    results = bounded_map(executor, resolve, repo_names, args.workers * WORK_QUEUE_PER_WORKER)
+    for repo_name, (latest_tag, error) in results:
+        yield repo_name, latest_tag, error
+
+
+class OwnerRefresh:
+    """One org or user's results, written out once every owner has been refreshed."""
+
+    def __init__(self, owner: str, kind: str):
+        self.owner = owner
+        self.kind = kind
+        self.versions: list[tuple[str, str]] = []
+        self.unversioned: dict[str, dict] = {}
+        self.repo_state: dict[str, dict] = {}
+        self.stale: dict[str, dict] = {}
+        self.failed: list[str] = []
+        self.listed = 0
+
+
+def refresh_owner(
+    args: argparse.Namespace, owner: str, kind: str, executor: Executor, deadline: float | None
+) -> OwnerRefresh:
+    """List one org or user's repos and resolve their latest tags, using and updating its own state files."""
+    result = OwnerRefresh(owner, kind)
+
+    with run_report.phase("load_state"):
+        # Load cached unversioned repos
+        unversioned = load_unversioned(owner)
+        if unversioned:
+            print(f"{owner}: loaded {len(unversioned)} known unversioned repos from cache")
+
+        repo_state = {} if args.full else load_repo_state(owner)
+        if repo_state:
+            print(f"{owner}: loaded stored state for {len(repo_state)} repos")
+
+        previous = load_versions(owner)
+        if previous:
+            print(f"{owner}: loaded {len(previous)} previous versions to check results against")
+        stale_before = load_stale(owner)
+
+        checkpoint = load_checkpoint(owner) if args.resume else {}
+        if checkpoint:
+            print(f"{owner}: resuming from {len(checkpoint)} repos checkpointed by an interrupted run")
+
+    versions = result.versions
+    new_unversioned = result.unversioned
+    new_repo_state = result.repo_state
+    stale = result.stale
+    failed = result.failed
+    pushed_at = {}
+    now = datetime.now(timezone.utc)
+
+    def carry_forward(repo_name: str, reason: str) -> None:
+        # Better a tag that may be out of date than dropping the repo
+        versions.append((repo_name, previous[repo_name]))
+        stale[repo_name] = stale_entry(previous[repo_name], reason, stale_before.get(repo_name), now)
+        print(f"{owner}/{repo_name}: {previous[repo_name]} (carried forward from the previous run)")
+
+    print(f"Fetching repos and tags for {owner}...")
+    with run_report.phase("fetch_tags"), open_checkpoint(checkpoint, owner) as checkpoint_file:
+
+        def repos_to_fetch() -> Iterator[str]:
+            """
+            Sort out each repo as its listing page arrives, yielding the ones whose tags
+            need looking up so workers can start before the whole org has been listed.
+            """
+            for repo in fetch_repos(owner, kind):
+                repo_name = repo.name
+                pushed_at[repo_name] = repo.pushed_at
+                run_report.count("listed")
+
+                # Skip repos known to have no vINTEGER tags, unless the entry is due for revalidation
+                entry = unversioned.get(repo_name)
+                if entry and unversioned_is_fresh(repo_name, entry, pushed_at[repo_name], now):
+                    print(f"Skipping {owner}/{repo_name} (cached as unversioned: {entry['reason']})")
+                    new_unversioned[repo_name] = entry
+                    run_report.count("unversioned_skipped")
+                    continue
+
+                # Nothing has been pushed, tags included, since we last resolved this repo
+                stored = repo_state.get(repo_name)
+                if stored and pushed_at[repo_name] and stored["pushed_at"] == pushed_at[repo_name]:
+                    versions.append((repo_name, stored["latest_tag"]))
+                    new_repo_state[repo_name] = stored
+                    print(f"{owner}/{repo_name}: {stored['latest_tag']} (no pushes since last run)")
+                    run_report.count("unchanged_reused")
+                    continue
+
+                # Resolved by the interrupted run we are resuming
+                done = checkpoint.get(repo_name)
+                if done and done["pushed_at"] == pushed_at[repo_name]:
+                    latest_tag = done["latest_tag"]
+                    if latest_tag:
+                        versions.append((repo_name, latest_tag))
+                        if pushed_at[repo_name]:
+                            new_repo_state[repo_name] = {"pushed_at": pushed_at[repo_name], "latest_tag": latest_tag}
+                    else:
+                        new_unversioned[repo_name] = done["unversioned"]
+                    print(f"{owner}/{repo_name}: {latest_tag or done['unversioned']['reason']} (from checkpoint)")
+                    run_report.count("resumed")
+                    continue
+
+                run_report.count("fetched")
+                yield repo_name
+
+        probe_from = previous if args.incremental else {}
+        try:
+            for repo_name, latest_tag, error in iter_latest_tags(
+                args, owner, repos_to_fetch(), probe_from, executor, deadline
+            ):
+                if isinstance(error, APIError) and error.status == 409:
+                    # GitHub's "Git Repository is empty" is a fact about the repo, not a failure
+                    print(f"{owner}/{repo_name}: empty repository")
+                    new_unversioned[repo_name] = unversioned_entry("empty-repository", pushed_at[repo_name])
+                elif error:
+                    # Don't cache failures as unversioned, or the repo would be skipped from now on
+                    print(f"{owner}/{repo_name}: error: {error}", file=sys.stderr)
+                    failed.append(repo_name)
+                    if repo_name in unversioned:
+                        new_unversioned[repo_name] = unversioned[repo_name]
+                    if args.partial and repo_name in previous:
+                        carry_forward(repo_name, str(error))
+                elif latest_tag:
+                    versions.append((repo_name, latest_tag))
+                    if pushed_at[repo_name]:
+                        new_repo_state[repo_name] = {"pushed_at": pushed_at[repo_name], "latest_tag": latest_tag}
+                    print(f"{owner}/{repo_name}: {latest_tag}")
+                else:
+                    print(f"{owner}/{repo_name}: no vINTEGER tag")
+                    new_unversioned[repo_name] = unversioned_entry("no-version-tags", pushed_at[repo_name])
+
+                if not error or isinstance(error, APIError) and error.status == 409:
+                    write_checkpoint(checkpoint_file, {
+                        "name": repo_name,
+                        "pushed_at": pushed_at[repo_name],
+                        "latest_tag": latest_tag,
+                        "unversioned": new_unversioned.get(repo_name),
+                    })
+        except (APIError, RateLimitError, DeadlineExceeded) as e:
+            # Lookup errors are handled per repo above, so this is the listing itself failing
+            if not args.partial:
+                raise
+            print(f"{owner}: error listing repos: {e}", file=sys.stderr)
+            resolved = {repo_name for repo_name, _ in versions} | set(new_unversioned) | set(failed)
+            for repo_name in previous:
+                if repo_name not in resolved:
+                    failed.append(repo_name)
+                    carry_forward(repo_name, f"listing {owner} failed: {e}")
+
+    result.listed = len(pushed_at)
+    print(f"{owner}: listed {result.listed} repos")
+
+    # A flaky or truncated page can make a repo look like it went down a major or
+    # lost its version, so only publish that once a direct lookup confirms it. Failed
+    # repos that were carried forward still have their previous tag, so only the
+    # ones that weren't are checked.
+    with run_report.phase("verify_regressions"):
+        latest = dict(versions)
+        for repo_name in find_regressions(previous, latest):
+            previous_tag = previous[repo_name]
+            found = "a failed lookup" if repo_name in failed else latest.get(repo_name, "no version")
+            if confirm_regression(owner, repo_name, previous_tag):
+                print(f"{owner}/{repo_name}: confirmed {previous_tag} is gone, now {found}")
+                run_report.count("regressions_confirmed")
+                continue
+            print(f"{owner}/{repo_name}: {previous_tag} still exists, keeping it instead of {found}", file=sys.stderr)
+            run_report.count("regressions_rejected")
+            latest[repo_name] = previous_tag
+            # Look the repo up again next run rather than trusting this result
+            new_unversioned.pop(repo_name, None)
+            new_repo_state.pop(repo_name, None)
+            if repo_name in failed:
+                reason = f"lookup failed and {previous_tag} still exists"
+            else:
+                reason = f"lookup found {found} but {previous_tag} still exists"
+            stale[repo_name] = stale_entry(previous_tag, reason, stale_before.get(repo_name), now)
+        # Sort alphabetically by repo name
+        result.versions = sorted(latest.items(), key=lambda x: x[0].lower())
+
+    return result
+
+
+def main(argv: list[str] | None = None):
     """Main function to fetch repos, get tags via API, and generate versions.txt."""
-    # Load cached unversioned repos
-    unversioned = load_unversioned()
-    if unversioned:
-        print(f"Loaded {len(unversioned)} known unversioned repos from cache")
+    args = parse_args(argv or [])
+    deadline = None if args.deadline is None else time.monotonic() + args.deadline
 
-    print(f"Fetching repos for {ORG_NAME}...")
-    repos = fetch_repos(ORG_NAME)
-    print(f"Found {len(repos)} repos")
+    # Keep enough idle connections around for every worker, and every owner's listing, to reuse its
+    # own, and as many again for hedges
+    in_flight = (args.workers + len(args.owners)) * (2 if args.hedge else 1)
+    client = get_client()
+    client.max_idle = max(client.max_idle, in_flight)
+    client.connect_timeout = args.connect_timeout
+    client.read_timeout = args.read_timeout
+    rate_limiter.use_tokens(github_tokens())
+    run_report.reset(client.stats, http_cache, rate_limiter, retrier, hedger, concurrency)
+    if args.hedge:
+        hedger.start(in_flight)
+    if args.adaptive:
+        concurrency.start(args.workers + len(args.owners))
 
-    versions = []
-    new_unversioned = set()
+    with run_report.phase("load_state"):
+        http_cache.load(HTTP_CACHE_FILE)
 
-    for repo in repos:
-        repo_name = repo["name"]
+    # Owners are crawled concurrently, sharing one pool of tag lookup workers, one
+    # connection pool and one rate limit budget
+    def refresh(owner: tuple[str, str]) -> OwnerRefresh:
+        # Listing and regression checks run on the owner's thread, so hold them to the deadline too
+        with deadline_scope(deadline, "deadline passed"):
+            return refresh_owner(args, owner[0], owner[1], executor, deadline)
 
-        # Skip repos known to have no vINTEGER tags
-        if repo_name in unversioned:
-            print(f"Skipping {repo_name} (cached as unversioned)")
-            new_unversioned.add(repo_name)
-            continue
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            with ThreadPoolExecutor(max_workers=len(args.owners)) as owner_executor:
+                results = list(owner_executor.map(refresh, args.owners))
+    finally:
+        hedger.stop()
+        concurrency.stop()
 
-        print(f"Fetching tags for {repo_name}...", end=" ")
-        tags = fetch_tags(ORG_NAME, repo_name)
-        latest_tag = get_latest_version_tag(tags)
+    with run_report.phase("write_output"):
+        # Each owner gets its own block, in the order they were given
+        versions_content = "\n".join(
+            f"{result.owner}/{repo_name}@{tag}" for result in results for repo_name, tag in result.versions
+        ) + "\n"
 
-        if latest_tag:
-            versions.append((repo_name, latest_tag))
-            print(f"{latest_tag}")
-        else:
-            print("no vINTEGER tag")
-            new_unversioned.add(repo_name)
+        # Write versions.txt
+        with open(VERSIONS_FILE, "w") as f:
+            f.write(versions_content)
+
+        # Update README.md with the versions
+        update_readme(versions_content)
 
-    # Sort alphabetically by repo name
-    versions.sort(key=lambda x: x[0].lower())
+        for result in results:
+            # Update unversioned.json
+            save_unversioned(result.unversioned, result.owner)
 
-    # Build versions content
-    versions_content = "\n".join(
-        f"{ORG_NAME}/{repo_name}@{tag}" for repo_name, tag in versions
-    ) + "\n"
+            save_repo_state(result.repo_state, result.owner)
 
-    # Write versions.txt
-    with open(VERSIONS_FILE, "w") as f:
-        f.write(versions_content)
+            save_stale(result.stale, result.owner)
 
-    # Update README.md with the versions
-    update_readme(versions_content)
+        http_cache.save(HTTP_CACHE_FILE)
 
-    # Update unversioned.txt
-    save_unversioned(new_unversioned)
+        # Every result is saved, so there is nothing left to resume
+        for result in results:
+            owner_file(CHECKPOINT_FILE, result.owner).unlink()
 
-    print(f"\nWrote {len(versions)} versions to {VERSIONS_FILE}")
-    print(f"Cached {len(new_unversioned)} unversioned repos to {UNVERSIONED_FILE}")
+    versioned = sum(len(result.versions) for result in results)
+    unversioned = sum(len(result.unversioned) for result in results)
+    failed = [f"{result.owner}/{repo_name}" for result in results for repo_name in result.failed]
+    stale = sum(len(result.stale) for result in results)
+    print(f"\nWrote {versioned} versions to {VERSIONS_FILE}")
+    print(f"Cached {unversioned} unversioned repos to {UNVERSIONED_FILE}")
+    if failed:
+        print(f"Failed to fetch tags for {len(failed)} repos: {', '.join(failed)}")
+    if stale:
+        print(f"Carried forward {stale} previous versions, listed in {STALE_FILE}")
+    run_report.count("versioned", versioned)
+    run_report.count("unversioned", unversioned)
+    run_report.count("failed", len(failed))
+    run_report.count("carried_forward", stale)
+    run_report.save(REPORT_FILE)
+    print(client.stats.summary())
+    print(http_cache.summary())
+    print(rate_limiter.summary())
+    print(retrier.summary())
+    if args.hedge:
+        print(hedger.summary())
+    if args.adaptive:
+        print(concurrency.summary())
+    print(f"Wrote run report to {REPORT_FILE}")
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
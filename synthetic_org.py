@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Generate large synthetic GitHub orgs for scale testing fetch_versions.py.
+
+The output is a fake_github.py fixture:
+
+    {"orgs": {"big-org": [{"name": ..., "id": ..., "pushed_at": ..., "archived": ...,
+                           "fork": ..., "tags": [...], "latest": "v7"}]}, "users": {}}
+
+Each repo also records the "latest" vINTEGER tag it should resolve to (or null),
+so tests can check results against ground truth. Repos are drawn from a mix
+modelled on the actions org:
+
+    versioned     vX.Y.Z releases plus moving vX major tags, sometimes with gaps
+    semver-only   vX.Y.Z releases but no major tags
+    no-tags       no tags at all
+    other-tags    tags that don't look like vINTEGER (release-3, 2024.01)
+    calver        timestamp tags like actions-sync's v202606241747
+
+Tag counts follow a long-tail (Pareto) distribution, so most repos have a
+handful of tags and a few have thousands.
+
+    python synthetic_org.py --org big-org --repos 5000 --output fixture.json
+"""
+
+import argparse
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+
+# Relative frequency of each kind of repo
+REPO_KINDS = {
+    "versioned": 0.50,
+    "semver-only": 0.15,
+    "no-tags": 0.20,
+    "other-tags": 0.12,
+    "calver": 0.03,
+}
+DEFAULT_MAX_TAGS = 2000
+# Shape of the tag count distribution; lower means a longer tail
+TAG_COUNT_ALPHA = 1.1
+
+NAME_PREFIXES = ["setup", "upload", "download", "deploy", "cache", "publish", "check", "create", "configure", "run"]
+NAME_NOUNS = ["python", "node", "go", "java", "artifact", "pages", "release", "sbom", "docker", "toolkit", "labels"]
+EPOCH = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def tag_count(rng: random.Random, max_tags: int) -> int:
+    """Draw a long-tail tag count between 1 and max_tags."""
+    return max(1, min(max_tags, int(rng.paretovariate(TAG_COUNT_ALPHA) * 2)))
+
+
+def release_tags(rng: random.Random, count: int) -> tuple[list[str], list[int]]:
+    """Make roughly count vX.Y.Z tags, returning them and the majors they span."""
+    majors = max(1, min(count // 8, 30) or 1)
+    # Skip the occasional major, as real projects sometimes do
+    major_numbers = []
+    major = 0
+    for _ in range(majors):
+        major += 2 if rng.random() < 0.1 else 1
+        major_numbers.append(major)
+    per_major = max(1, count // majors)
+    tags = [f"v{major}.{minor // 10}.{minor % 10}" for major in major_numbers for minor in range(per_major)]
+    return tags, major_numbers
+
+
+def generate_repo(rng: random.Random, index: int, kind: str, max_tags: int) -> dict:
+    """Generate one repo of the given kind."""
+    name = f"{rng.choice(NAME_PREFIXES)}-{rng.choice(NAME_NOUNS)}-{index:05d}"
+    pushed_at = EPOCH - timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60))
+    tags: list[str] = []
+    latest = None
+
+    if kind == "versioned":
+        tags, majors = release_tags(rng, tag_count(rng, max_tags))
+        # Not every major gets a moving tag, but the newest one does
+        moving = [major for major in majors if major == majors[-1] or rng.random() < 0.8]
+        tags += [f"v{major}" for major in moving]
+        latest = f"v{moving[-1]}"
+    elif kind == "semver-only":
+        tags, _ = release_tags(rng, tag_count(rng, max_tags))
+    elif kind == "other-tags":
+        tags = [f"release-{i}" for i in range(1, tag_count(rng, 20) + 1)] + ["2024.01", "V1", "v1-beta"]
+    elif kind == "calver":
+        stamps = sorted(
+            (EPOCH - timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60))).strftime("%Y%m%d%H%M")
+            for _ in range(tag_count(rng, 50))
+        )
+        tags = [f"v{stamp}" for stamp in stamps]
+        latest = tags[-1]
+
+    rng.shuffle(tags)
+    return {
+        "name": name,
+        "id": 100000 + index,
+        "pushed_at": pushed_at.strftime("%Y-%m-%dT%H:%M:%SZ") if kind != "no-tags" or rng.random() < 0.9 else None,
+        "archived": rng.random() < 0.1,
+        "fork": rng.random() < 0.05,
+        "tags": tags,
+        "latest": latest,
+    }
+
+
+def generate_org(repo_count: int, seed: int = 0, max_tags: int = DEFAULT_MAX_TAGS) -> list[dict]:
+    """Generate repo_count repos, reproducibly for a given seed."""
+    rng = random.Random(seed)
+    kinds = list(REPO_KINDS)
+    weights = list(REPO_KINDS.values())
+    return [generate_repo(rng, i, rng.choices(kinds, weights)[0], max_tags) for i in range(repo_count)]
+
+
+def generate_fixture(orgs: dict[str, int], seed: int = 0, max_tags: int = DEFAULT_MAX_TAGS) -> dict:
+    """Generate a fake_github fixture with an org of the given size for each name."""
+    return {
+        "orgs": {org: generate_org(count, seed + i, max_tags) for i, (org, count) in enumerate(orgs.items())},
+        "users": {},
+    }
+
+
+def expected_versions(fixture: dict, org: str) -> str:
+    """The versions.txt fetch_versions.py should write for org."""
+    repos = sorted((repo for repo in fixture["orgs"][org] if repo["latest"]), key=lambda repo: repo["name"].lower())
+    return "".join(f"{org}/{repo['name']}@{repo['latest']}\n" for repo in repos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic org fixture for fake_github.py")
+    parser.add_argument("--org", action="append", help="org name (repeatable, default synthetic)")
+    parser.add_argument("--repos", type=int, default=1000, help="repos per org")
+    parser.add_argument("--max-tags", type=int, default=DEFAULT_MAX_TAGS, help="most tags any repo can have")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, required=True)
+    args = parser.parse_args()
+
+    fixture = generate_fixture({org: args.repos for org in args.org or ["synthetic"]}, args.seed, args.max_tags)
+    args.output.write_text(json.dumps(fixture))
+    for org, repos in fixture["orgs"].items():
+        tags = sum(len(repo["tags"]) for repo in repos)
+        versioned = sum(1 for repo in repos if repo["latest"])
+        print(f"{org}: {len(repos)} repos, {versioned} versioned, {tags} tags")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
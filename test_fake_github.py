@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Unit tests for fake_github.py
+"""
+
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import fetch_versions
+from fake_github import FakeGitHub, FakeGitHubServer
+
+
+FIXTURE = {
+    "orgs": {
+        "actions": [
+            {"name": f"repo-{i}", "id": i, "pushed_at": "2026-10-01T00:00:00Z", "tags": ["v1", "v1.0.0", "v2"]}
+            for i in range(5)
+        ]
+    },
+    "users": {"octocat": [{"name": "hello", "id": 100, "pushed_at": None, "tags": []}]},
+}
+
+
+class TestFakeGitHub(unittest.TestCase):
+    """Tests for the fake GitHub API server."""
+
+    def setUp(self):
+        self.client = fetch_versions.HTTPClient()
+        self.addCleanup(self.client.close)
+
+    def get(self, server, path, headers=None):
+        return self.get_with(self.client, server, path, headers)
+
+    def get_with(self, client, server, path, headers=None):
+        return client.request("GET", server.url + path, headers=headers)
+
+    def test_pagination_respects_max_per_page(self):
+        """Test that per_page is capped by the server's page size."""
+        with FakeGitHubServer(FakeGitHub(FIXTURE, max_per_page=2)) as server:
+            pages = [self.get(server, f"/orgs/actions/repos?per_page=100&page={page}").json() for page in (1, 2, 3)]
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(pages[0][0]["clone_url"], "https://github.com/actions/repo-0.git")
+        self.assertIn("owner", pages[0][0])
+
+    def test_etag_not_modified(self):
+        """Test that a matching If-None-Match gets an empty 304 that isn't charged."""
+        fake = FakeGitHub(FIXTURE, rate_limit=10)
+        with FakeGitHubServer(fake) as server:
+            first = self.get(server, "/repos/actions/repo-0/tags")
+            second = self.get(server, "/repos/actions/repo-0/tags", {"If-None-Match": first.headers["etag"]})
+
+        self.assertEqual(second.status, 304)
+        self.assertEqual(second.body, b"")
+        self.assertEqual(second.headers["x-ratelimit-remaining"], "9")
+        self.assertEqual(fake.stats()["not_modified"], 1)
+
+    def test_rate_limit_exhaustion(self):
+        """Test that requests past the budget get 403s with rate limit headers."""
+        fake = FakeGitHub(FIXTURE, rate_limit=2)
+        with FakeGitHubServer(fake) as server:
+            responses = [self.get(server, "/repos/actions/repo-0/tags") for _ in range(3)]
+
+        self.assertEqual([response.status for response in responses], [200, 200, 403])
+        self.assertEqual(responses[2].headers["x-ratelimit-remaining"], "0")
+        self.assertEqual(fake.stats()["rate_limited"], 1)
+
+    def test_rate_limit_per_token(self):
+        """Test that each token has its own budget, separate from unauthenticated requests."""
+        fake = FakeGitHub(FIXTURE, rate_limit=1)
+        with FakeGitHubServer(fake) as server:
+            statuses = [
+                self.get(server, "/repos/actions/repo-0/tags", headers).status
+                for headers in ({"Authorization": "Bearer a"}, {"Authorization": "Bearer b"}, None, {"Authorization": "Bearer a"})
+            ]
+
+        self.assertEqual(statuses, [200, 200, 200, 403])
+
+    def test_secondary_limit(self):
+        """Test that every Nth request is rejected with Retry-After."""
+        with FakeGitHubServer(FakeGitHub(FIXTURE, secondary_limit_every=2, retry_after=3)) as server:
+            responses = [self.get(server, "/repos/actions/repo-0/tags") for _ in range(2)]
+
+        self.assertEqual(responses[1].status, 403)
+        self.assertEqual(responses[1].headers["retry-after"], "3")
+
+    def test_max_concurrent(self):
+        """Test that requests past max_concurrent in flight get a secondary rate limit."""
+        fake = FakeGitHub(FIXTURE, latency=0.3, max_concurrent=1, retry_after=2)
+        with FakeGitHubServer(fake) as server, ThreadPoolExecutor(2) as pool:
+            clients = [fetch_versions.HTTPClient() for _ in range(2)]
+            responses = list(pool.map(lambda client: self.get_with(client, server, "/repos/actions/repo-0/tags"), clients))
+            for client in clients:
+                client.close()
+
+        self.assertEqual(sorted(response.status for response in responses), [200, 403])
+        limited = max(responses, key=lambda response: response.status)
+        self.assertEqual(limited.headers["retry-after"], "2")
+        self.assertIn(b"secondary rate limit", limited.body)
+        self.assertEqual(fake.stats()["peak_active"], 1)
+
+    def test_random_server_errors(self):
+        """Test that error_rate answers that fraction of requests with 502s."""
+        fake = FakeGitHub(FIXTURE, error_rate=0.5, seed=1)
+        with FakeGitHubServer(fake) as server:
+            statuses = [self.get(server, "/repos/actions/repo-0/tags").status for _ in range(40)]
+
+        self.assertEqual(set(statuses), {200, 502})
+        self.assertEqual(statuses.count(502), fake.stats()["server_errors"])
+
+    def test_slow_responses(self):
+        """Test that slow_rate makes that fraction of responses slow_latency seconds slower."""
+        with FakeGitHubServer(FakeGitHub(FIXTURE, slow_rate=1.0, slow_latency=0.2)) as server:
+            response = self.get(server, "/repos/actions/repo-0/tags")
+
+        self.assertGreaterEqual(response.elapsed, 0.2)
+
+    def test_matching_and_single_refs(self):
+        """Test the git ref endpoints."""
+        with FakeGitHubServer(FakeGitHub(FIXTURE)) as server:
+            refs = self.get(server, "/repos/actions/repo-1/git/matching-refs/tags/v1").json()
+            found = self.get(server, "/repos/actions/repo-1/git/ref/tags/v2")
+            missing = self.get(server, "/repos/actions/repo-1/git/ref/tags/v3")
+            empty = self.get(server, "/repos/octocat/hello/git/matching-refs/tags/v")
+
+        self.assertEqual([ref["ref"] for ref in refs], ["refs/tags/v1", "refs/tags/v1.0.0"])
+        self.assertEqual((found.status, missing.status, empty.status), (200, 404, 409))
+
+    def test_graphql_requires_auth(self):
+        """Test that GraphQL rejects unauthenticated requests like the real API."""
+        with FakeGitHubServer(FakeGitHub(FIXTURE)) as server:
+            response = self.client.request("POST", f"{server.url}/graphql", body=json.dumps({"query": "{}"}).encode())
+
+        self.assertEqual(response.status, 401)
+
+    def test_users_repos(self):
+        """Test listing a user's repos."""
+        with FakeGitHubServer(FakeGitHub(FIXTURE)) as server:
+            repos = self.get(server, "/users/octocat/repos").json()
+            missing = self.get(server, "/orgs/octocat/repos")
+
+        self.assertEqual([repo["name"] for repo in repos], ["hello"])
+        self.assertEqual(missing.status, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
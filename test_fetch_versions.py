@@ -3,64 +3,239 @@
 Unit tests for fetch_versions.py
 """
 
+import gzip
+import contextlib
+import io
 import json
+import os
+import shutil
+import subprocess
 import tempfile
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import fetch_versions
+from fetch_versions import RepoRecord
+from fake_github import FakeGitHub, FakeGitHubHandler, FakeGitHubServer
+
+
+def json_response(data, status=200, headers=None):
+    """Build a Response carrying a JSON body, as returned by api_get."""
+    return fetch_versions.Response(status, headers or {}, json.dumps(data).encode())
+
+
+@contextlib.contextmanager
+def isolated_files():
+    """Point every file main() reads or writes at a fresh temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = Path(tmpdir)
+        readme = tmppath / "README.md"
+        readme.write_text("# test\n")
+        with patch.multiple(
+            fetch_versions,
+            VERSIONS_FILE=tmppath / "versions.txt",
+            UNVERSIONED_FILE=tmppath / "unversioned.json",
+            LEGACY_UNVERSIONED_FILE=tmppath / "unversioned.txt",
+            HTTP_CACHE_FILE=tmppath / "http_cache.json",
+            REPO_STATE_FILE=tmppath / "repo_state.json",
+            REPORT_FILE=tmppath / "report.json",
+            CHECKPOINT_FILE=tmppath / "checkpoint.jsonl",
+            STALE_FILE=tmppath / "stale.json",
+            README_FILE=readme,
+            http_cache=fetch_versions.ConditionalCache(),
+            rate_limiter=fetch_versions.RateLimitScheduler(),
+            retrier=fetch_versions.Retrier(),
+            hedger=fetch_versions.Hedger(),
+            concurrency=fetch_versions.AdaptiveConcurrency(),
+            run_report=fetch_versions.RunReport(),
+        ):
+            yield tmppath
+
+
+class LocalServer:
+    """Run a handler class on an ephemeral localhost port for the duration of a test."""
+
+    def __init__(self, handler):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler that echoes the request path and client port as JSON."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"path": self.path, "port": self.client_address[1]}).encode()
+        if "gzip" in self.path:
+            body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if "gzip" in self.path:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DroppingHandler(EchoHandler):
+    """Handler that silently closes every connection after answering, like an idle timeout."""
+
+    def do_GET(self):
+        super().do_GET()
+        self.close_connection = True
+
+
+class StallingHandler(EchoHandler):
+    """Handler that answers tag listings straight away, except for repos named stuck, which hang."""
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up waiting, as it should
+
+    def do_GET(self):
+        if "stuck" in self.path:
+            time.sleep(2)
+        if "/tags" in self.path:
+            body = json.dumps([{"name": "v2", "commit": {"sha": "a"}}]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+
+class TestHTTPClient(unittest.TestCase):
+    """Tests for the pooled keep-alive HTTPClient."""
+
+    def test_reuses_connection(self):
+        """Test that sequential requests to one host share a single connection."""
+        client = fetch_versions.HTTPClient()
+        with LocalServer(EchoHandler) as server:
+            first = client.request("GET", f"{server.url}/one?page=1").json()
+            second = client.request("GET", f"{server.url}/two").json()
+            client.close()
+
+        self.assertEqual(first["path"], "/one?page=1")
+        self.assertEqual(first["port"], second["port"])
+        self.assertEqual(client.stats.requests, 2)
+        self.assertEqual(client.stats.connections_opened, 1)
+        self.assertEqual(client.stats.connections_reused, 1)
+        self.assertEqual(len(client.stats.timings), 2)
+
+    def test_decodes_gzip(self):
+        """Test that gzip-encoded bodies are decompressed."""
+        client = fetch_versions.HTTPClient()
+        with LocalServer(EchoHandler) as server:
+            response = client.request("GET", f"{server.url}/gzip")
+            client.close()
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.json()["path"], "/gzip")
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+
+    def test_reconnects_after_server_closes_idle_connection(self):
+        """Test that a stale pooled connection is replaced transparently."""
+        client = fetch_versions.HTTPClient()
+        with LocalServer(DroppingHandler) as server:
+            client.request("GET", f"{server.url}/one")
+            response = client.request("GET", f"{server.url}/two")
+            client.close()
+
+        self.assertEqual(response.json()["path"], "/two")
+        self.assertEqual(client.stats.connections_opened, 2)
+
+    def test_read_timeout(self):
+        """Test that a server that stops responding times out instead of hanging."""
+        client = fetch_versions.HTTPClient(read_timeout=0.2)
+        with LocalServer(StallingHandler) as server:
+            start = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                client.request("GET", f"{server.url}/stuck")
+            # A per-request timeout can only shorten it
+            with self.assertRaises(TimeoutError):
+                client.request("GET", f"{server.url}/stuck", timeout=0.1)
+            client.close()
+
+        self.assertLess(time.monotonic() - start, 1.0)
 
 
 class TestFetchRepos(unittest.TestCase):
     """Tests for the fetch_repos function."""
 
-    @patch("fetch_versions.subprocess.run")
-    def test_fetch_repos_single_page(self, mock_run):
+    @patch("fetch_versions.api_get")
+    def test_fetch_repos_single_page(self, mock_get):
         """Test fetching repos when all fit on one page."""
         mock_repos = [
             {"name": "setup-python", "clone_url": "https://github.com/actions/setup-python.git"},
             {"name": "setup-node", "clone_url": "https://github.com/actions/setup-node.git"},
         ]
 
-        mock_run.return_value = MagicMock(
-            stdout=json.dumps(mock_repos),
-            returncode=0,
-        )
+        mock_get.return_value = json_response(mock_repos)
 
-        repos = fetch_versions.fetch_repos("actions")
+        repos = list(fetch_versions.fetch_repos("actions"))
 
         self.assertEqual(len(repos), 2)
-        self.assertEqual(repos[0]["name"], "setup-python")
-        self.assertEqual(repos[1]["name"], "setup-node")
-
-    @patch("fetch_versions.subprocess.run")
-    def test_fetch_repos_multiple_pages(self, mock_run):
+        self.assertEqual(repos[0].name, "setup-python")
+        self.assertEqual(repos[1].name, "setup-node")
+
+    def test_fetch_repos_keeps_only_used_fields(self):
+        """Test that full repo objects are projected to RepoRecords, in memory and in the cache."""
+        fake = FakeGitHub(END_TO_END_FIXTURE)
+        with FakeGitHubServer(fake) as server, isolated_files():
+            with patch.object(fetch_versions, "GITHUB_API_URL", server.url):
+                repos = list(fetch_versions.fetch_repos("actions"))
+            (entry,) = fetch_versions.http_cache.entries.values()
+
+        self.assertEqual(repos[0], RepoRecord("checkout", 1, False, False, "2026-10-01T00:00:00Z"))
+        self.assertEqual(entry["data"][0], ["checkout", 1, False, False, "2026-10-01T00:00:00Z"])
+
+    @patch("fetch_versions.api_get")
+    def test_fetch_repos_multiple_pages(self, mock_get):
         """Test fetching repos when pagination is needed."""
         # First page - full page of 100 repos
         first_page = [{"name": f"repo-{i}", "clone_url": f"https://github.com/actions/repo-{i}.git"} for i in range(100)]
         # Second page - partial page (last page)
         second_page = [{"name": "repo-100", "clone_url": "https://github.com/actions/repo-100.git"}]
 
-        mock_run.side_effect = [
-            MagicMock(stdout=json.dumps(first_page), returncode=0),
-            MagicMock(stdout=json.dumps(second_page), returncode=0),
+        mock_get.side_effect = [
+            json_response(first_page),
+            json_response(second_page),
         ]
 
-        repos = fetch_versions.fetch_repos("actions")
+        repos = list(fetch_versions.fetch_repos("actions"))
 
         self.assertEqual(len(repos), 101)
-        self.assertEqual(mock_run.call_count, 2)
+        self.assertEqual(mock_get.call_count, 2)
 
-    @patch("fetch_versions.subprocess.run")
-    def test_fetch_repos_empty(self, mock_run):
+    @patch("fetch_versions.api_get")
+    def test_fetch_repos_empty(self, mock_get):
         """Test fetching repos when org has no repos."""
-        mock_run.return_value = MagicMock(
-            stdout=json.dumps([]),
-            returncode=0,
-        )
+        mock_get.return_value = json_response([])
 
-        repos = fetch_versions.fetch_repos("empty-org")
+        repos = list(fetch_versions.fetch_repos("empty-org"))
 
         self.assertEqual(len(repos), 0)
 
@@ -68,8 +243,8 @@ class TestFetchRepos(unittest.TestCase):
 class TestFetchTags(unittest.TestCase):
     """Tests for the fetch_tags function."""
 
-    @patch("fetch_versions.subprocess.run")
-    def test_fetch_tags_single_page(self, mock_run):
+    @patch("fetch_versions.api_get")
+    def test_fetch_tags_single_page(self, mock_get):
         """Test fetching tags when all fit on one page."""
         mock_tags = [
             {"name": "v1"},
@@ -77,91 +252,1152 @@ class TestFetchTags(unittest.TestCase):
             {"name": "v3"},
         ]
 
-        mock_run.return_value = MagicMock(
-            stdout=json.dumps(mock_tags),
-            returncode=0,
-        )
+        mock_get.return_value = json_response(mock_tags)
 
         tags = fetch_versions.fetch_tags("actions", "setup-python")
 
         self.assertEqual(len(tags), 3)
         self.assertEqual(tags, ["v1", "v2", "v3"])
 
-    @patch("fetch_versions.subprocess.run")
-    def test_fetch_tags_multiple_pages(self, mock_run):
+    @patch("fetch_versions.api_get")
+    def test_fetch_tags_multiple_pages(self, mock_get):
         """Test fetching tags when pagination is needed."""
         # First page - full page of 100 tags
         first_page = [{"name": f"v{i}"} for i in range(100)]
         # Second page - partial page (last page)
         second_page = [{"name": "v100"}]
 
-        mock_run.side_effect = [
-            MagicMock(stdout=json.dumps(first_page), returncode=0),
-            MagicMock(stdout=json.dumps(second_page), returncode=0),
+        mock_get.side_effect = [
+            json_response(first_page),
+            json_response(second_page),
         ]
 
         tags = fetch_versions.fetch_tags("actions", "big-repo")
 
         self.assertEqual(len(tags), 101)
-        self.assertEqual(mock_run.call_count, 2)
+        self.assertEqual(mock_get.call_count, 2)
 
-    @patch("fetch_versions.subprocess.run")
-    def test_fetch_tags_empty(self, mock_run):
+    @patch("fetch_versions.api_get")
+    def test_fetch_tags_empty(self, mock_get):
         """Test fetching tags when repo has no tags."""
-        mock_run.return_value = MagicMock(
-            stdout=json.dumps([]),
-            returncode=0,
-        )
+        mock_get.return_value = json_response([])
 
         tags = fetch_versions.fetch_tags("actions", "no-tags-repo")
 
         self.assertEqual(len(tags), 0)
 
-    @patch("fetch_versions.subprocess.run")
-    def test_fetch_tags_api_error(self, mock_run):
+    @patch("fetch_versions.api_get")
+    def test_fetch_tags_api_error(self, mock_get):
         """Test handling API error response."""
-        mock_run.return_value = MagicMock(
-            stdout=json.dumps({"message": "API rate limit exceeded"}),
-            returncode=0,
+        mock_get.return_value = json_response({"message": "API rate limit exceeded"}, status=403)
+
+        with self.assertRaises(fetch_versions.APIError) as cm:
+            fetch_versions.fetch_tags("actions", "some-repo")
+
+        self.assertEqual(str(cm.exception), "API rate limit exceeded")
+
+
+class TestFetchMatchingTags(unittest.TestCase):
+    """Tests for the matching-refs tag source."""
+
+    @patch("fetch_versions.api_get")
+    def test_keeps_only_major_tags(self, mock_get):
+        """Test that only refs/tags/vINTEGER refs survive."""
+        refs = [
+            {"ref": "refs/tags/v1", "object": {"sha": "a", "type": "commit"}},
+            {"ref": "refs/tags/v1.2.3", "object": {"sha": "b", "type": "commit"}},
+            {"ref": "refs/tags/v12", "object": {"sha": "c", "type": "tag"}},
+            {"ref": "refs/tags/very-old", "object": {"sha": "d", "type": "commit"}},
+        ]
+        mock_get.return_value = json_response(refs)
+
+        tags = fetch_versions.fetch_matching_tags("actions", "checkout")
+
+        self.assertEqual(tags, ["v1", "v12"])
+        self.assertTrue(mock_get.call_args[0][0].endswith("/repos/actions/checkout/git/matching-refs/tags/v"))
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("fetch_versions.api_get")
+    def test_api_error(self, mock_get):
+        """Test that an error response raises APIError with its status."""
+        mock_get.return_value = json_response({"message": "Git Repository is empty."}, status=409)
+
+        with self.assertRaises(fetch_versions.APIError) as cm:
+            fetch_versions.fetch_matching_tags("actions", "empty")
+
+        self.assertEqual(cm.exception.status, 409)
+
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_matching_tags")
+    @patch("fetch_versions.fetch_repos")
+    def test_main_tag_source(self, mock_fetch_repos, mock_fetch_matching_tags, mock_fetch_tags):
+        """Test that --tag-source matching-refs replaces tag paging in main()."""
+        mock_fetch_repos.return_value = [RepoRecord("checkout")]
+        mock_fetch_matching_tags.return_value = ["v6", "v7"]
+
+        with isolated_files() as tmppath:
+            fetch_versions.main(["--tag-source", "matching-refs"])
+            content = (tmppath / "versions.txt").read_text()
+
+        self.assertEqual(content, "actions/checkout@v7\n")
+        mock_fetch_matching_tags.assert_called_once_with("actions", "checkout")
+        mock_fetch_tags.assert_not_called()
+
+
+def ref_lookup(existing):
+    """Build an api_get stand-in that answers git/ref lookups for the given repo@tag names."""
+
+    def lookup(url, headers=None):
+        repo_name, tag = url.split("/repos/actions/", 1)[1].split("/git/ref/tags/")
+        if f"{repo_name}@{tag}" in existing:
+            return json_response({"ref": f"refs/tags/{tag}"})
+        return json_response({"message": "Not Found"}, status=404)
+
+    return lookup
+
+
+class TestIncremental(unittest.TestCase):
+    """Tests for probing the next major version instead of listing tags."""
+
+    def test_load_versions(self):
+        """Test reading the previous versions.txt back into a mapping."""
+        with isolated_files() as tmppath:
+            (tmppath / "versions.txt").write_text("actions/cache@v6\nactions/checkout@v7\nother/x@v1\n")
+            versions = fetch_versions.load_versions()
+
+        self.assertEqual(versions, {"cache": "v6", "checkout": "v7"})
+
+    @patch("fetch_versions.api_get")
+    def test_probe_miss(self, mock_get):
+        """Test that no newer major means only the next majors are probed."""
+        mock_get.side_effect = ref_lookup({"checkout@v7"})
+
+        self.assertFalse(fetch_versions.probe_next_major("actions", "checkout", "v7"))
+
+        urls = [call[0][0] for call in mock_get.call_args_list]
+        self.assertEqual([url.rsplit("/", 1)[1] for url in urls], ["v8", "v9"])
+        self.assertIn("/repos/actions/checkout/git/ref/tags/v8", urls[0])
+
+    @patch("fetch_versions.api_get")
+    def test_probe_hit_after_gap(self, mock_get):
+        """Test that a skipped major is still found."""
+        mock_get.side_effect = ref_lookup({"checkout@v9"})
+
+        self.assertTrue(fetch_versions.probe_next_major("actions", "checkout", "v7"))
+
+    @patch("fetch_versions.api_get")
+    def test_calendar_versions_are_not_probed(self, mock_get):
+        """Test that calver tags always fall back to listing tags."""
+        self.assertTrue(fetch_versions.probe_next_major("actions", "actions-sync", "v202606241747"))
+        mock_get.assert_not_called()
+
+    @patch("fetch_versions.get_latest_version_tag")
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.api_get")
+    @patch("fetch_versions.fetch_repos")
+    def test_main_incremental(self, mock_fetch_repos, mock_get, mock_fetch_tags, mock_get_tag):
+        """Test that only repos with a probe hit or no previous entry list their tags."""
+        mock_fetch_repos.return_value = [RepoRecord("cache"), RepoRecord("checkout"), RepoRecord("new-action")]
+        mock_get.side_effect = ref_lookup({"checkout@v8"})
+        mock_fetch_tags.side_effect = lambda org, repo_name: {"checkout": ["v7", "v8"], "new-action": ["v1"]}[
+            repo_name
+        ]
+        mock_get_tag.side_effect = lambda tags: tags[-1]
+
+        with isolated_files() as tmppath:
+            (tmppath / "versions.txt").write_text("actions/cache@v6\nactions/checkout@v7\n")
+            fetch_versions.main(["--incremental"])
+            content = (tmppath / "versions.txt").read_text()
+
+        self.assertEqual(content, "actions/cache@v6\nactions/checkout@v8\nactions/new-action@v1\n")
+        self.assertEqual(sorted(call[0][1] for call in mock_fetch_tags.call_args_list), ["checkout", "new-action"])
+        self.assertEqual(mock_get_tag.call_count, 2)
+
+
+class GitHTTPBackendHandler(BaseHTTPRequestHandler):
+    """Serve repositories under project_root through `git http-backend`, like a git host."""
+
+    protocol_version = "HTTP/1.1"
+    project_root = ""
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        path, _, query = self.path.partition("?")
+        env = {
+            "PATH": os.environ["PATH"],
+            "GIT_PROJECT_ROOT": self.project_root,
+            "GIT_HTTP_EXPORT_ALL": "1",
+            "GIT_PROTOCOL": self.headers.get("Git-Protocol", ""),
+            "REQUEST_METHOD": "POST",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "CONTENT_TYPE": self.headers.get("Content-Type", ""),
+            "CONTENT_LENGTH": str(length),
+            "REMOTE_ADDR": "127.0.0.1",
+        }
+        result = subprocess.run(["git", "http-backend"], input=body, env=env, capture_output=True)
+        head, _, payload = result.stdout.partition(b"\r\n\r\n")
+        status = 200
+        headers = []
+        for line in head.decode().split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.lower() == "status":
+                status = int(value.split()[0])
+            elif name.lower() != "content-length":
+                headers.append((name, value.strip()))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestFetchTagsGit(unittest.TestCase):
+    """Tests for the git protocol v2 ls-refs tag source."""
+
+    def test_parse_pkt_lines(self):
+        """Test splitting a pkt-line stream, including flush and delim packets."""
+        data = fetch_versions.pkt_line(b"a\n") + b"0001" + fetch_versions.pkt_line(b"bc\n") + b"0000"
+
+        self.assertEqual(list(fetch_versions.parse_pkt_lines(data)), [b"a\n", None, b"bc\n", None])
+        self.assertEqual(fetch_versions.pkt_line(b"command=ls-refs\n"), b"0014command=ls-refs\n")
+
+    @unittest.skipUnless(shutil.which("git"), "git is not installed")
+    def test_against_git_http_backend(self):
+        """Test listing tags from a real repository served by git http-backend."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            work = Path(tmpdir) / "work"
+            git = ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", "-C", str(work)]
+            subprocess.run(["git", "init", "-q", str(work)], check=True)
+            subprocess.run(git + ["commit", "-q", "--allow-empty", "-m", "init"], check=True)
+            for tag in ("v1", "v2", "v2.1.0", "release-3"):
+                subprocess.run(git + ["tag", tag], check=True)
+            subprocess.run(git + ["tag", "-a", "v10", "-m", "annotated"], check=True)
+            bare = Path(tmpdir) / "root" / "actions" / "checkout.git"
+            subprocess.run(["git", "clone", "-q", "--bare", str(work), str(bare)], check=True)
+
+            handler = type("Handler", (GitHTTPBackendHandler,), {"project_root": str(Path(tmpdir) / "root")})
+            with LocalServer(handler) as server:
+                with patch.object(fetch_versions, "GITHUB_SERVER_URL", server.url):
+                    tags = fetch_versions.fetch_tags_git("actions", "checkout")
+                    with self.assertRaises(fetch_versions.APIError) as cm:
+                        fetch_versions.fetch_tags_git("actions", "missing")
+
+        self.assertEqual(sorted(tags), ["v1", "v10", "v2", "v2.1.0"])
+        self.assertEqual(fetch_versions.get_latest_version_tag(tags), "v10")
+        self.assertEqual(cm.exception.status, 404)
+
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_tags_git")
+    @patch("fetch_versions.fetch_repos")
+    def test_main_tag_source(self, mock_fetch_repos, mock_fetch_tags_git, mock_fetch_tags):
+        """Test that --tag-source git is used by main()."""
+        mock_fetch_repos.return_value = [RepoRecord("checkout")]
+        mock_fetch_tags_git.return_value = ["v7"]
+
+        with isolated_files() as tmppath:
+            fetch_versions.main(["--tag-source", "git"])
+            content = (tmppath / "versions.txt").read_text()
+
+        self.assertEqual(content, "actions/checkout@v7\n")
+        mock_fetch_tags.assert_not_called()
+
+
+class TestRepoState(unittest.TestCase):
+    """Tests for skipping repos whose pushed_at has not changed."""
+
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_repos")
+    def test_unchanged_repos_are_not_fetched(self, mock_fetch_repos, mock_fetch_tags):
+        """Test that the second run only fetches tags for the repo that was pushed to."""
+        mock_fetch_tags.side_effect = lambda org, repo_name: {"cache": ["v6"], "checkout": ["v7"]}[repo_name]
+
+        with isolated_files() as tmppath:
+            mock_fetch_repos.return_value = [
+                RepoRecord("cache", pushed_at="2026-10-01T00:00:00Z"),
+                RepoRecord("checkout", pushed_at="2026-10-01T00:00:00Z"),
+            ]
+            fetch_versions.main([])
+            self.assertEqual(mock_fetch_tags.call_count, 2)
+
+            mock_fetch_tags.reset_mock()
+            mock_fetch_tags.side_effect = lambda org, repo_name: ["v7", "v8"]
+            mock_fetch_repos.return_value = [
+                RepoRecord("cache", pushed_at="2026-10-01T00:00:00Z"),
+                RepoRecord("checkout", pushed_at="2026-10-14T00:00:00Z"),
+            ]
+            fetch_versions.main([])
+            content = (tmppath / "versions.txt").read_text()
+            state = json.loads((tmppath / "repo_state.json").read_text())
+
+        mock_fetch_tags.assert_called_once_with("actions", "checkout")
+        self.assertEqual(content, "actions/cache@v6\nactions/checkout@v8\n")
+        self.assertEqual(state["checkout"], {"pushed_at": "2026-10-14T00:00:00Z", "latest_tag": "v8"})
+
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_repos")
+    def test_full_ignores_state(self, mock_fetch_repos, mock_fetch_tags):
+        """Test that --full looks up every repo regardless of stored state."""
+        mock_fetch_repos.return_value = [RepoRecord("cache", pushed_at="2026-10-01T00:00:00Z")]
+        mock_fetch_tags.return_value = ["v6"]
+
+        with isolated_files():
+            fetch_versions.main([])
+            fetch_versions.main(["--full"])
+
+        self.assertEqual(mock_fetch_tags.call_count, 2)
+
+
+class FakeClock:
+    """A clock whose sleep() just advances time, for testing pacing without waiting."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def rate_limit_headers(remaining, limit=5000, reset=1_003_600):
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(reset),
+    }
+
+
+class TestCheckpoint(unittest.TestCase):
+    """Tests for checkpointing results and resuming an interrupted run."""
+
+    REPOS = [
+        RepoRecord("checkout", pushed_at="2026-10-01T00:00:00Z"),
+        RepoRecord("docs", pushed_at="2026-10-02T00:00:00Z"),
+        RepoRecord("setup-node", pushed_at="2026-10-03T00:00:00Z"),
+        RepoRecord("setup-python", pushed_at="2026-10-04T00:00:00Z"),
+    ]
+    TAGS = {"checkout": ["v7"], "docs": [], "setup-node": ["v6"], "setup-python": ["v6"]}
+
+    def interrupt_at(self, stop_at):
+        """A fetch_tags side effect that is rate limited once it reaches stop_at."""
+
+        def fetch_tags(org, repo_name):
+            if repo_name == stop_at:
+                raise fetch_versions.RateLimitError("core rate limit will not reset for 3600s")
+            return self.TAGS[repo_name]
+
+        return fetch_tags
+
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_repos")
+    def test_resume_after_interruption(self, mock_fetch_repos, mock_fetch_tags):
+        """Test that --resume only looks up the repos an interrupted run didn't finish."""
+        mock_fetch_repos.return_value = self.REPOS
+        mock_fetch_tags.side_effect = self.interrupt_at("setup-node")
+
+        with isolated_files() as tmppath:
+            with self.assertRaises(fetch_versions.RateLimitError):
+                fetch_versions.main(["--workers", "1"])
+            self.assertFalse((tmppath / "versions.txt").exists())
+            self.assertEqual(set(fetch_versions.load_checkpoint()), {"checkout", "docs"})
+
+            mock_fetch_tags.reset_mock()
+            mock_fetch_tags.side_effect = lambda org, repo_name: self.TAGS[repo_name]
+            fetch_versions.main(["--resume"])
+            content = (tmppath / "versions.txt").read_text()
+            unversioned = fetch_versions.load_unversioned()
+            checkpoint_left = (tmppath / "checkpoint.jsonl").exists()
+
+        self.assertEqual(
+            sorted(call.args[1] for call in mock_fetch_tags.call_args_list), ["setup-node", "setup-python"]
+        )
+        self.assertEqual(content, "actions/checkout@v7\nactions/setup-node@v6\nactions/setup-python@v6\n")
+        self.assertEqual(unversioned["docs"]["reason"], "no-version-tags")
+        self.assertFalse(checkpoint_left)
+
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_repos")
+    def test_resume_refetches_pushed_and_truncated(self, mock_fetch_repos, mock_fetch_tags):
+        """Test that repos pushed to since, or cut short in the file, are looked up again."""
+        mock_fetch_repos.return_value = self.REPOS
+        mock_fetch_tags.side_effect = lambda org, repo_name: self.TAGS[repo_name]
+
+        with isolated_files() as tmppath:
+            (tmppath / "checkpoint.jsonl").write_text(
+                json.dumps({"name": "checkout", "pushed_at": "2026-09-01T00:00:00Z", "latest_tag": "v6",
+                            "unversioned": None}) + "\n"
+                + json.dumps({"name": "setup-node", "pushed_at": "2026-10-03T00:00:00Z", "latest_tag": "v6",
+                              "unversioned": None}) + "\n"
+                + '{"name": "setup-python", "pushed'
+            )
+            fetch_versions.main(["--resume"])
+            content = (tmppath / "versions.txt").read_text()
+
+        self.assertEqual(
+            sorted(call.args[1] for call in mock_fetch_tags.call_args_list), ["checkout", "docs", "setup-python"]
         )
+        self.assertIn("actions/checkout@v7\n", content)
 
-        tags = fetch_versions.fetch_tags("actions", "some-repo")
+    @patch("fetch_versions.fetch_repos")
+    def test_resume_interrupted_again_keeps_checkpoint(self, mock_fetch_repos):
+        """Test that a resumed run that is interrupted before reaching the checkpointed repos keeps them."""
+        mock_fetch_repos.side_effect = fetch_versions.RateLimitError("core rate limit will not reset for 3600s")
+        records = [
+            {"name": name, "pushed_at": "2026-10-01T00:00:00Z", "latest_tag": "v7", "unversioned": None}
+            for name in ("checkout", "cache")
+        ]
 
-        self.assertEqual(len(tags), 0)
+        with isolated_files() as tmppath:
+            (tmppath / "checkpoint.jsonl").write_text("".join(json.dumps(record) + "\n" for record in records))
+            with self.assertRaises(fetch_versions.RateLimitError), contextlib.redirect_stdout(io.StringIO()):
+                fetch_versions.main(["--resume"])
+            checkpoint = fetch_versions.load_checkpoint()
+
+        self.assertEqual(checkpoint, {record["name"]: record for record in records})
+
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_repos")
+    def test_checkpoint_ignored_without_resume(self, mock_fetch_repos, mock_fetch_tags):
+        """Test that a normal run starts from scratch even if a checkpoint exists."""
+        mock_fetch_repos.return_value = self.REPOS
+        mock_fetch_tags.side_effect = self.interrupt_at("setup-node")
+
+        with isolated_files():
+            with self.assertRaises(fetch_versions.RateLimitError):
+                fetch_versions.main(["--workers", "1"])
+            mock_fetch_tags.reset_mock()
+            mock_fetch_tags.side_effect = lambda org, repo_name: self.TAGS[repo_name]
+            fetch_versions.main([])
+
+        self.assertEqual(mock_fetch_tags.call_count, 4)
+
+
+class TestPartialResults(unittest.TestCase):
+    """Tests for carrying forward previous versions with --partial and --deadline."""
+
+    PREVIOUS = "actions/cache@v4\nactions/checkout@v6\nactions/setup-node@v5\n"
+
+    def run_main(self, tmppath, args, fetch_tags):
+        (tmppath / "versions.txt").write_text(self.PREVIOUS)
+        repos = [RepoRecord(name, pushed_at="2026-10-01T00:00:00Z") for name in ("cache", "checkout", "setup-node")]
+        with patch("fetch_versions.fetch_repos", return_value=repos), \
+                patch("fetch_versions.fetch_tags", side_effect=fetch_tags) as mock_fetch_tags, \
+                contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            fetch_versions.main(args)
+        return mock_fetch_tags, (tmppath / "versions.txt").read_text(), fetch_versions.load_stale()
+
+    def test_failures_carried_forward(self):
+        """Test that failed and rate limited repos keep their previous tag and are marked stale."""
+
+        def fetch_tags(org, repo_name):
+            if repo_name == "cache":
+                raise fetch_versions.APIError("Server Error", 502)
+            if repo_name == "setup-node":
+                raise fetch_versions.RateLimitError("core rate limit will not reset for 3600s")
+            return ["v7"]
+
+        with isolated_files() as tmppath:
+            _, content, stale = self.run_main(tmppath, ["--partial", "--workers", "1"], fetch_tags)
+            repo_state = fetch_versions.load_repo_state()
+
+        self.assertEqual(content, "actions/cache@v4\nactions/checkout@v7\nactions/setup-node@v5\n")
+        self.assertEqual(set(stale), {"cache", "setup-node"})
+        self.assertEqual(stale["cache"]["latest_tag"], "v4")
+        self.assertEqual(stale["cache"]["reason"], "Server Error")
+        # Carried forward entries are looked up again next time
+        self.assertEqual(set(repo_state), {"checkout"})
+
+    def test_stale_since_is_kept(self):
+        """Test that an entry still stale on the next run keeps when it first went stale."""
+
+        def fetch_tags(org, repo_name):
+            raise fetch_versions.APIError("Server Error", 502)
+
+        with isolated_files() as tmppath:
+            fetch_versions.save_stale({"cache": {"latest_tag": "v4", "reason": "x", "since": "2026-10-01T00:00:00+00:00"}})
+            _, _, stale = self.run_main(tmppath, ["--partial"], fetch_tags)
+
+        self.assertEqual(stale["cache"]["since"], "2026-10-01T00:00:00+00:00")
+        self.assertNotEqual(stale["checkout"]["since"], "2026-10-01T00:00:00+00:00")
+
+    def test_deadline(self):
+        """Test that nothing is looked up after the deadline, and everything is carried forward."""
+        with isolated_files() as tmppath:
+            mock_fetch_tags, content, stale = self.run_main(tmppath, ["--deadline", "0"], lambda org, repo_name: ["v9"])
+
+        mock_fetch_tags.assert_not_called()
+        self.assertEqual(content, self.PREVIOUS)
+        self.assertEqual(len(stale), 3)
+        self.assertIn("deadline", stale["checkout"]["reason"])
+
+    def test_without_partial(self):
+        """Test that without --partial a rate limit ends the run, leaving versions.txt alone."""
+
+        def fetch_tags(org, repo_name):
+            if repo_name == "setup-node":
+                raise fetch_versions.RateLimitError("core rate limit will not reset for 3600s")
+            raise fetch_versions.APIError("Server Error", 502)
+
+        with isolated_files() as tmppath:
+            with self.assertRaises(fetch_versions.RateLimitError):
+                self.run_main(tmppath, ["--workers", "1"], fetch_tags)
+            self.assertEqual((tmppath / "versions.txt").read_text(), self.PREVIOUS)
+
+
+class TestRateLimitScheduler(unittest.TestCase):
+    """Tests for pacing requests by the X-RateLimit headers."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = fetch_versions.RateLimitScheduler(clock=self.clock.time, sleep=self.clock.sleep)
+
+    def test_no_delay_with_plenty_of_budget(self):
+        """Test that requests are not slowed while the budget is healthy."""
+        self.scheduler.update("core", json_response([], headers=rate_limit_headers(4000)))
+        for _ in range(10):
+            self.scheduler.acquire("core")
+
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_paces_low_budget_until_reset(self):
+        """Test that the reserve is spread evenly over the time until reset."""
+        self.scheduler.update("core", json_response([], headers=rate_limit_headers(10, limit=200, reset=1_000_100)))
+        for _ in range(3):
+            self.scheduler.acquire("core")
+
+        # 100 seconds left for 10 requests: one every 10 seconds
+        self.assertEqual(self.clock.sleeps, [10.0, 10.0])
+
+    def test_waits_for_reset_when_exhausted(self):
+        """Test that an exhausted budget waits for the reset time."""
+        limited = json_response({"message": "API rate limit exceeded"}, status=403, headers=rate_limit_headers(0, reset=1_000_030))
+
+        self.assertTrue(self.scheduler.update("core", limited))
+        self.scheduler.acquire("core")
+
+        self.assertEqual(self.clock.sleeps, [31.0])
+
+    def test_gives_up_on_long_waits(self):
+        """Test that a reset too far away raises instead of hanging the run."""
+        self.scheduler.update("core", json_response([], status=403, headers=rate_limit_headers(0, reset=1_003_600)))
+
+        with self.assertRaises(fetch_versions.RateLimitError):
+            self.scheduler.acquire("core")
+
+    def test_wait_stops_at_deadline(self):
+        """Test that a wait that would run past the deadline raises instead of sleeping."""
+        self.scheduler.update("core", json_response([], status=403, headers=rate_limit_headers(0, reset=1_000_030)))
+
+        with fetch_versions.deadline_scope(time.monotonic() + 60, "long deadline"):
+            self.scheduler.acquire("core")
+        self.scheduler.update("core", json_response([], status=403, headers=rate_limit_headers(0, reset=self.clock.now + 30)))
+        with fetch_versions.deadline_scope(time.monotonic() + 5, "deadline passed"):
+            with self.assertRaisesRegex(fetch_versions.DeadlineExceeded, "deadline passed"):
+                self.scheduler.acquire("core")
+
+        self.assertEqual(self.clock.sleeps, [31.0])
+
+    def test_secondary_limit_pauses_every_resource(self):
+        """Test that Retry-After pauses all requests, not just the one that hit it."""
+        limited = json_response({"message": "You have exceeded a secondary rate limit"}, status=403, headers={"Retry-After": "5"})
+
+        self.assertTrue(self.scheduler.update("core", limited))
+        self.scheduler.acquire("graphql")
+
+        self.assertEqual(self.clock.sleeps, [5.0])
+
+    def test_secondary_limit_without_retry_after(self):
+        """Test the default pause when the secondary limit gives no Retry-After."""
+        limited = json_response({"message": "You have exceeded a secondary rate limit."}, status=403)
+
+        self.assertTrue(self.scheduler.update("core", limited))
+        self.scheduler.acquire("core")
+
+        self.assertEqual(self.clock.sleeps, [fetch_versions.SECONDARY_RATE_LIMIT_PAUSE])
+
+    def test_other_forbidden_is_not_rate_limited(self):
+        """Test that an ordinary 403 is passed through."""
+        forbidden = json_response({"message": "Resource not accessible"}, status=403, headers=rate_limit_headers(4000))
+
+        self.assertFalse(self.scheduler.update("core", forbidden))
+
+    @patch("fetch_versions.get_client")
+    def test_api_request_retries_after_secondary_limit(self, mock_get_client):
+        """Test that api_request waits out a secondary limit and retries."""
+        mock_get_client.return_value.request.side_effect = [
+            json_response({"message": "secondary rate limit"}, status=429, headers={"Retry-After": "2"}),
+            json_response([{"name": "v1"}]),
+        ]
+
+        with patch.object(fetch_versions, "rate_limiter", self.scheduler):
+            response = fetch_versions.api_request("GET", "https://api.github.com/repos/a/b/tags")
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.clock.sleeps, [2.0])
+
+    def test_spreads_requests_by_remaining_budget(self):
+        """Test that each request goes out on the token with the most budget left."""
+        scheduler = fetch_versions.RateLimitScheduler(clock=self.clock.time, sleep=self.clock.sleep, tokens=["a", "b"])
+        scheduler.update("core", json_response([], headers=rate_limit_headers(4000)), "a")
+        scheduler.update("core", json_response([], headers=rate_limit_headers(4002)), "b")
+
+        tokens = [scheduler.acquire("core") for _ in range(6)]
+
+        self.assertEqual(tokens, ["b", "b", "a", "b", "a", "b"])
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_exhausted_token_retired_until_reset(self):
+        """Test that a token out of budget is skipped while others can still send."""
+        scheduler = fetch_versions.RateLimitScheduler(clock=self.clock.time, sleep=self.clock.sleep, tokens=["a", "b"])
+        limited = json_response({"message": "API rate limit exceeded"}, status=403, headers=rate_limit_headers(0, reset=1_000_030))
+        scheduler.update("core", limited, "a")
+        scheduler.update("core", json_response([], headers=rate_limit_headers(1, reset=1_000_060)), "b")
+
+        self.assertEqual(scheduler.acquire("core"), "b")
+        # Both are exhausted now, so wait for the sooner reset
+        self.assertEqual(scheduler.acquire("core"), "a")
+        self.assertEqual(self.clock.sleeps, [31.0])
+
+    def test_secondary_limit_pauses_only_its_token(self):
+        """Test that Retry-After on one token leaves the rest of the pool running."""
+        scheduler = fetch_versions.RateLimitScheduler(clock=self.clock.time, sleep=self.clock.sleep, tokens=["a", "b"])
+        limited = json_response({"message": "secondary rate limit"}, status=403, headers={"Retry-After": "60"})
+        scheduler.update("core", limited, "a")
+
+        self.assertEqual([scheduler.acquire("core") for _ in range(3)], ["b", "b", "b"])
+        self.assertEqual(self.clock.sleeps, [])
+
+    @patch("fetch_versions.get_client")
+    def test_api_request_authenticates_with_chosen_token(self, mock_get_client):
+        """Test that the token the scheduler picks is sent, and its headers are credited to it."""
+        scheduler = fetch_versions.RateLimitScheduler(clock=self.clock.time, sleep=self.clock.sleep, tokens=["a", "b"])
+        scheduler.update("core", json_response([], headers=rate_limit_headers(10)), "a")
+        mock_get_client.return_value.request.return_value = json_response([], headers=rate_limit_headers(3000))
+
+        with patch.object(fetch_versions, "rate_limiter", scheduler):
+            fetch_versions.api_request("GET", "https://api.github.com/repos/a/b/tags", headers={"Accept": "x"})
+
+        headers = mock_get_client.return_value.request.call_args.kwargs["headers"]
+        self.assertEqual(headers, {"Accept": "x", "Authorization": "Bearer b"})
+        self.assertEqual(scheduler.budgets[("b", "core")].remaining, 3000)
+        self.assertEqual(scheduler.budgets[("a", "core")].remaining, 10)
+
+    def test_github_tokens_from_environment(self):
+        """Test reading the pool from GITHUB_TOKENS and GITHUB_TOKEN."""
+        environ = {"GITHUB_TOKENS": "one, two\nthree", "GITHUB_TOKEN": "two"}
+        with patch.dict("os.environ", environ):
+            self.assertEqual(fetch_versions.github_tokens(), ["one", "two", "three"])
+        with patch.dict("os.environ", {"GITHUB_TOKENS": "", "GITHUB_TOKEN": ""}):
+            self.assertEqual(fetch_versions.github_tokens(), [])
+
+
+class TestRetrier(unittest.TestCase):
+    """Tests for retrying transient failures and the per-host circuit breaker."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        # Always wait the longest backoff, so the delays are predictable
+        self.retrier = fetch_versions.Retrier(
+            threshold=3, cooldown=60, clock=self.clock.time, sleep=self.clock.sleep, jitter=lambda low, high: high
+        )
+
+    def test_retries_server_errors_with_backoff(self):
+        """Test that 5xx responses and connection errors are retried with growing delays."""
+        send = MagicMock(side_effect=[json_response({}, status=502), ConnectionResetError(), json_response(["ok"])])
+
+        response = self.retrier.call("api.github.com", send)
+
+        self.assertEqual(response.json(), ["ok"])
+        self.assertEqual(self.clock.sleeps, [1.0, 2.0])
+        self.assertEqual((self.retrier.retries, self.retrier.retry_time), (2, 3.0))
+
+    def test_permanent_errors_not_retried(self):
+        """Test that a 404 comes straight back."""
+        send = MagicMock(return_value=json_response({"message": "Not Found"}, status=404))
+
+        self.assertEqual(self.retrier.call("api.github.com", send).status, 404)
+        self.assertEqual(send.call_count, 1)
+
+    def test_gives_up_after_max_retries(self):
+        """Test that a persistent error is raised as an APIError once retries run out."""
+        retrier = fetch_versions.Retrier(max_retries=2, clock=self.clock.time, sleep=self.clock.sleep)
+        send = MagicMock(side_effect=TimeoutError("timed out"))
+
+        with self.assertRaisesRegex(fetch_versions.APIError, "TimeoutError: timed out"):
+            retrier.call("api.github.com", send)
+        self.assertEqual(send.call_count, 3)
+
+    def test_honours_retry_after(self):
+        """Test that a 503's Retry-After is waited out if it is longer than the backoff."""
+        send = MagicMock(side_effect=[json_response({}, status=503, headers={"Retry-After": "20"}), json_response([])])
+
+        self.retrier.call("api.github.com", send)
+
+        self.assertEqual(self.clock.sleeps, [20.0])
+
+    def test_circuit_breaker_fails_fast_until_probe_succeeds(self):
+        """Test that a failing host is cut off, then let back in by a successful probe."""
+        down = MagicMock(side_effect=ConnectionRefusedError())
+        with self.assertRaises(fetch_versions.APIError):
+            self.retrier.call("api.github.com", down)
+        self.assertEqual(down.call_count, 3)
+
+        # Open: nothing is sent, and other hosts are unaffected
+        with self.assertRaises(fetch_versions.CircuitOpenError):
+            self.retrier.call("api.github.com", down)
+        self.assertEqual(down.call_count, 3)
+        self.assertEqual(self.retrier.call("github.com", MagicMock(return_value=json_response([]))).status, 200)
+
+        # After the cooldown one probe goes through, and its success closes the circuit
+        self.clock.now += 60
+        up = MagicMock(return_value=json_response([]))
+        self.retrier.call("api.github.com", up)
+        self.retrier.call("api.github.com", up)
+        self.assertEqual(up.call_count, 2)
+        self.assertEqual((self.retrier.circuit_trips, self.retrier.fast_failures), (1, 1))
+
+    @patch("fetch_versions.HTTPClient.request")
+    def test_flaky_network_does_not_crash_main(self, mock_request):
+        """Test that a repo whose requests keep failing is reported as failed rather than crashing the run."""
+
+        def request(method, url, headers=None, body=None, timeout=None):
+            if "/flaky/" in url:
+                raise ConnectionResetError("Connection reset by peer")
+            if "/healthy/" in url:
+                return json_response([{"name": "v2", "commit": {"sha": "a"}}])
+            return json_response([])
+
+        mock_request.side_effect = request
+        repos = [RepoRecord(name, pushed_at="2026-10-01T00:00:00Z") for name in ("flaky", "healthy")]
+
+        with isolated_files() as tmppath, \
+                patch.object(fetch_versions, "retrier", fetch_versions.Retrier(sleep=lambda seconds: None)), \
+                patch("fetch_versions.fetch_repos", return_value=repos), \
+                contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            fetch_versions.main(["--workers", "1"])
+            report = json.loads((tmppath / "report.json").read_text())
+            content = (tmppath / "versions.txt").read_text()
+
+        self.assertEqual(content, "actions/healthy@v2\n")
+        self.assertEqual(report["repos"]["failed"], 1)
+        self.assertEqual(report["retries"]["retries"], fetch_versions.MAX_RETRIES)
+
+
+class TestHedger(unittest.TestCase):
+    """Tests for hedging slow requests with a duplicate."""
+
+    def setUp(self):
+        self.hedger = fetch_versions.Hedger(min_samples=3, max_ratio=1.0)
+        self.hedger.start(4)
+        self.addCleanup(self.hedger.stop)
+        # Slow copies block on this until the test is done with them
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        for _ in range(3):
+            self.hedger.call(lambda wire: (fetch_versions.Response(200, {}, b"fast", 0.01), False))
+
+    def sends(self, *behaviours):
+        """A send() whose successive calls answer fast, hang, or fail."""
+        calls = iter(behaviours)
+
+        def send(wire):
+            if wire:
+                wire.sent()
+            behaviour = next(calls)
+            if behaviour == "fail":
+                raise fetch_versions.APIError("Server Error", 502)
+            if behaviour == "slow":
+                self.release.wait(5)
+            return fetch_versions.Response(200, {}, behaviour.encode(), 0.01), False
+
+        return send
+
+    def test_slow_request_is_hedged(self):
+        """Test that a request slower than the p95 gets a duplicate, and the first answer wins."""
+        start = time.monotonic()
+        response, _ = self.hedger.call(self.sends("slow", "hedge"))
+
+        self.assertEqual(response.body, b"hedge")
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual((self.hedger.hedged, self.hedger.hedge_wins), (1, 1))
+
+    def test_failed_copy_ignored_if_other_succeeds(self):
+        """Test that an error from the hedge doesn't lose a good primary response."""
+        send = self.sends("slow", "fail")
+        threading.Timer(0.2, self.release.set).start()
+
+        response, _ = self.hedger.call(send)
+
+        self.assertEqual(response.body, b"slow")
+        self.assertEqual(self.hedger.hedge_wins, 0)
+
+    def test_extra_requests_capped(self):
+        """Test that no more than max_ratio of requests are hedged."""
+        self.hedger.max_ratio = 0.0
+        self.release.set()
+
+        response, _ = self.hedger.call(self.sends("slow", "hedge"))
+
+        self.assertEqual(response.body, b"slow")
+        self.assertEqual(self.hedger.hedged, 0)
+
+    def test_no_hedging_until_latencies_known(self):
+        """Test that requests are not hedged before there are enough latencies to judge them by."""
+        self.assertIsNotNone(self.hedger.delay())
+        self.assertIsNone(fetch_versions.Hedger(min_samples=3).delay())
+
+    def test_hedge_keeps_deadline(self):
+        """Test that requests sent from the hedger's threads keep the caller's deadline."""
+        with fetch_versions.deadline_scope(time.monotonic() + 30, "test deadline"):
+            response, _ = self.hedger.call(lambda wire: (fetch_versions.Response(200, {}, b"", fetch_versions.time_left()), False))
+
+        self.assertLessEqual(response.elapsed, 30)
+
+    @patch("fetch_versions.get_client")
+    def test_hedges_go_through_rate_limiter(self, mock_get_client):
+        """Test that api_request hedges GETs, with the hedge paced and counted by the scheduler."""
+        # The first copy hangs, the hedge answers straight away
+        waits = iter([self.release.wait, lambda timeout: None])
+
+        def request(method, url, headers=None, body=None, timeout=None):
+            next(waits)(5)
+            return json_response(["ok"])
+
+        mock_get_client.return_value.request.side_effect = request
+        scheduler = fetch_versions.RateLimitScheduler(tokens=["a", "b"])
+
+        with patch.object(fetch_versions, "hedger", self.hedger), patch.object(fetch_versions, "rate_limiter", scheduler):
+            response = fetch_versions.api_request("GET", "https://api.github.com/repos/a/b/tags")
+
+        self.assertEqual(response.json(), ["ok"])
+        self.assertEqual(sum(scheduler.requests.values()), 2)
+
+    @patch("fetch_versions.get_client")
+    def test_waiting_on_pacing_is_not_hedged(self, mock_get_client):
+        """Test that a request held back by the rate limit scheduler isn't hedged once it's sent."""
+        mock_get_client.return_value.request.return_value = json_response(["ok"])
+        scheduler = fetch_versions.RateLimitScheduler()
+        # A secondary limit pauses the token for far longer than the p95 of 0.01s
+        scheduler.paused_until[None] = time.time() + 0.3
+
+        with patch.object(fetch_versions, "hedger", self.hedger), patch.object(fetch_versions, "rate_limiter", scheduler):
+            response = fetch_versions.api_request("GET", "https://api.github.com/repos/a/b/tags")
+
+        self.assertEqual(response.json(), ["ok"])
+        self.assertEqual(self.hedger.hedged, 0)
+        self.assertEqual(sum(scheduler.requests.values()), 1)
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    """Tests for finding how many requests to have in flight with AIMD."""
+
+    def setUp(self):
+        self.limiter = fetch_versions.AdaptiveConcurrency(window=4, probe_rounds=2)
+        self.limiter.start(32, initial=4)
+
+    def finish(self, response, count=1):
+        """Send count requests through the limiter that come back with response."""
+        for _ in range(count):
+            self.assertTrue(self.limiter.acquire(0))
+            self.limiter.release(response)
+
+    def test_doubles_until_first_throttle(self):
+        """Test that the limit grows by one per healthy response until something goes wrong."""
+        self.finish(fetch_versions.Response(200, {}, b"", 0.1), 4)
+
+        self.assertEqual(self.limiter.limit, 8)
+
+    def test_throttle_halves_once_per_window(self):
+        """Test that a burst of secondary rate limits halves the limit once, not once per response."""
+        self.finish(fetch_versions.Response(200, {}, b"", 0.1), 4)
+        throttled = json_response({"message": "secondary rate limit"}, status=403, headers={"Retry-After": "1"})
+
+        self.finish(throttled, 3)
+
+        self.assertEqual(self.limiter.limit, 4)
+        self.assertEqual((self.limiter.decreases, self.limiter.throttled), (1, 3))
+
+    def test_grows_slowly_back_to_safe_limit(self):
+        """Test that after a cut the limit grows additively, and only probes past where it was throttled now and then."""
+        healthy = fetch_versions.Response(200, {}, b"", 0.1)
+        self.finish(healthy, 4)
+        self.finish(fetch_versions.Response(429, {}, b""))
+
+        self.finish(healthy, 4)
+        self.assertAlmostEqual(self.limiter.limit, 4.92, places=2)
+        # Back up to 7, then probe_rounds round trips at 7 before trying 8
+        self.finish(healthy, 26)
+        self.assertEqual(self.limiter.limit, 7)
+        self.finish(healthy, 2)
+        self.assertGreater(self.limiter.limit, 7)
+
+    def test_errors_and_primary_limit_hold(self):
+        """Test that failures not caused by sending too much at once leave the limit alone."""
+        self.finish(None)
+        self.finish(fetch_versions.Response(502, {}, b""))
+        self.finish(json_response({"message": "API rate limit exceeded"}, status=403))
+
+        self.assertEqual(self.limiter.limit, 4)
+        self.assertEqual(self.limiter.decreases, 0)
+
+    def test_rising_latency_cuts(self):
+        """Test that the limit is cut once the median latency doubles from the lowest seen."""
+        self.finish(fetch_versions.Response(200, {}, b"", 0.1), 4)
+        self.assertEqual(self.limiter.limit, 8)
+
+        self.finish(fetch_versions.Response(200, {}, b"", 0.3), 3)
+
+        self.assertEqual(self.limiter.limit, 5)
+        self.assertEqual((self.limiter.decreases, self.limiter.throttled), (1, 0))
+
+    def test_acquire_waits_at_limit(self):
+        """Test that acquire blocks once the limit is reached, and stop() lifts it."""
+        for _ in range(4):
+            self.assertTrue(self.limiter.acquire(0))
+
+        self.assertFalse(self.limiter.acquire(0.05))
+        self.limiter.stop()
+        self.assertTrue(self.limiter.acquire(0))
+
+
+class TestDeadlines(unittest.TestCase):
+    """Tests for per-repo timeouts and cutting off requests at the run deadline."""
+
+    def run_main(self, tmppath, server, args):
+        (tmppath / "versions.txt").write_text("actions/checkout@v1\nactions/stuck@v1\n")
+        repos = [RepoRecord(name, pushed_at="2026-10-01T00:00:00Z") for name in ("checkout", "stuck")]
+        with patch("fetch_versions.GITHUB_API_URL", server.url), \
+                patch("fetch_versions.fetch_repos", return_value=repos), \
+                contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            start = time.monotonic()
+            fetch_versions.main(args)
+            elapsed = time.monotonic() - start
+        return elapsed, (tmppath / "versions.txt").read_text(), fetch_versions.load_stale()
+
+    def test_repo_timeout(self):
+        """Test that a repo that hangs is given up on, while the others are looked up."""
+        with isolated_files() as tmppath, LocalServer(StallingHandler) as server:
+            elapsed, content, stale = self.run_main(tmppath, server, ["--partial", "--repo-timeout", "0.3"])
+
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(content, "actions/checkout@v2\nactions/stuck@v1\n")
+        self.assertEqual(list(stale), ["stuck"])
+        self.assertIn("longer than 0.3s", stale["stuck"]["reason"])
+
+    def test_deadline_cuts_off_requests_in_flight(self):
+        """Test that the run deadline cancels a hung request and writes out what resolved."""
+        with isolated_files() as tmppath, LocalServer(StallingHandler) as server:
+            elapsed, content, stale = self.run_main(tmppath, server, ["--deadline", "0.5"])
+
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(content, "actions/checkout@v2\nactions/stuck@v1\n")
+        self.assertIn("deadline passed", stale["stuck"]["reason"])
+
+    def test_deadline_scope_keeps_earliest(self):
+        """Test that a nested scope can't extend an outer deadline."""
+        now = time.monotonic()
+        with fetch_versions.deadline_scope(now + 10, "outer"):
+            with fetch_versions.deadline_scope(now + 100, "inner"):
+                self.assertLessEqual(fetch_versions.time_left(), 10)
+            with fetch_versions.deadline_scope(now - 1, "passed"):
+                with self.assertRaisesRegex(fetch_versions.DeadlineExceeded, "passed"):
+                    fetch_versions.time_left()
+        self.assertIsNone(fetch_versions.time_left())
+
+
+class TestConditionalCache(unittest.TestCase):
+    """Tests for ETag / Last-Modified conditional requests."""
+
+    @patch("fetch_versions.api_get")
+    def test_not_modified_reuses_cached_data(self, mock_get):
+        """Test that a 304 returns the stored page without a body."""
+        cache = fetch_versions.ConditionalCache()
+        mock_get.side_effect = [
+            json_response([{"name": "v1", "commit": {"sha": "abc"}}], headers={"ETag": 'W/"one"'}),
+            fetch_versions.Response(304, {}, b""),
+        ]
+
+        first = cache.get_json("https://api/tags", extract=lambda page: [tag["name"] for tag in page])
+        second = cache.get_json("https://api/tags", extract=lambda page: [tag["name"] for tag in page])
+
+        self.assertEqual(first, ["v1"])
+        self.assertEqual(second, ["v1"])
+        self.assertEqual(mock_get.call_args_list[0][1]["headers"], {})
+        self.assertEqual(mock_get.call_args_list[1][1]["headers"], {"If-None-Match": 'W/"one"'})
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    @patch("fetch_versions.api_get")
+    def test_sends_if_modified_since(self, mock_get):
+        """Test that Last-Modified is replayed as If-Modified-Since."""
+        cache = fetch_versions.ConditionalCache()
+        last_modified = "Wed, 14 Oct 2026 04:51:00 GMT"
+        mock_get.side_effect = [
+            json_response([], headers={"Last-Modified": last_modified}),
+            json_response([{"name": "new"}], headers={"Last-Modified": "later"}),
+        ]
+
+        cache.get_json("https://api/repos")
+        result = cache.get_json("https://api/repos")
+
+        self.assertEqual(mock_get.call_args_list[1][1]["headers"], {"If-Modified-Since": last_modified})
+        self.assertEqual(result, [{"name": "new"}])
+        self.assertEqual(cache.entries["https://api/repos"]["last_modified"], "later")
+
+    @patch("fetch_versions.api_get")
+    def test_errors_are_not_cached(self, mock_get):
+        """Test that error responses never become cache entries."""
+        cache = fetch_versions.ConditionalCache()
+        mock_get.return_value = json_response({"message": "Not Found"}, status=404, headers={"ETag": '"x"'})
+
+        with self.assertRaises(fetch_versions.APIError):
+            cache.get_json("https://api/missing")
+
+        self.assertEqual(cache.entries, {})
+
+    @patch("fetch_versions.api_get")
+    def test_persisted_across_runs(self, mock_get):
+        """Test that validators survive a save/load round trip and stale entries are pruned."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "http_cache.json"
+            cache = fetch_versions.ConditionalCache()
+            mock_get.return_value = json_response([{"name": "v2"}], headers={"ETag": '"two"'})
+            cache.get_json("https://api/tags")
+            cache.entries["https://api/old"] = {"etag": '"old"', "last_modified": None, "seen": 0, "data": []}
+            cache.save(path)
+
+            reloaded = fetch_versions.ConditionalCache()
+            reloaded.load(path)
+            mock_get.return_value = fetch_versions.Response(304, {}, b"")
+            result = reloaded.get_json("https://api/tags")
+
+        self.assertEqual(result, [{"name": "v2"}])
+        self.assertNotIn("https://api/old", reloaded.entries)
+
+    def test_old_cache_version_discarded(self):
+        """Test that a cache written in an older format is ignored rather than misread."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "http_cache.json"
+            path.write_text(json.dumps({"https://api/repos": {"etag": '"x"', "seen": 0, "data": [{"name": "a"}]}}))
+            cache = fetch_versions.ConditionalCache()
+            cache.load(path)
+
+        self.assertEqual(cache.entries, {})
+
+
+class TestRunReport(unittest.TestCase):
+    """Tests for the per-run report."""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = [i / 100 for i in range(1, 101)]
+        self.assertEqual(fetch_versions.percentile(values, 0.5), 0.5)
+        self.assertEqual(fetch_versions.percentile(values, 0.99), 0.99)
+        self.assertEqual(fetch_versions.percentile([3.0], 0.95), 3.0)
+        self.assertIsNone(fetch_versions.percentile([], 0.5))
+
+    def test_phases_and_request_deltas(self):
+        """Test phase timings, and that requests from before the run aren't counted."""
+        clock = FakeClock()
+        stats = fetch_versions.HTTPStats()
+        stats.requests, stats.timings = 2, [5.0, 5.0]
+        cache = fetch_versions.ConditionalCache()
+        cache.hits = 4
+        report = fetch_versions.RunReport(clock=clock.time)
+        report.reset(stats, cache)
+
+        with report.phase("list_repos"):
+            clock.sleep(1.5)
+        report.add_time("parse_tags", 0.25)
+        report.add_time("parse_tags", 0.25)
+        report.count("listed", 3)
+        stats.requests += 2
+        stats.timings += [0.1, 0.3]
+        cache.hits += 1
+
+        data = report.to_dict()
+        self.assertEqual(data["phases"], {"list_repos": 1.5, "parse_tags": 0.5})
+        self.assertEqual(data["duration"], 1.5)
+        self.assertEqual(data["repos"]["listed"], 3)
+        self.assertEqual(data["http"]["requests"], 2)
+        self.assertEqual(data["conditional_requests"], {"hits": 1, "misses": 0})
+        self.assertEqual(data["latency"], {"p50_ms": 100.0, "p95_ms": 300.0, "p99_ms": 300.0})
 
 
 class TestUnversionedCache(unittest.TestCase):
     """Tests for the unversioned repos caching functions."""
 
     def test_load_unversioned_file_not_exists(self):
-        """Test loading when unversioned.txt doesn't exist."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch.object(fetch_versions, "UNVERSIONED_FILE", Path(tmpdir) / "unversioned.txt"):
-                result = fetch_versions.load_unversioned()
-                self.assertEqual(result, set())
+        """Test loading when neither unversioned.json nor unversioned.txt exist."""
+        with isolated_files():
+            result = fetch_versions.load_unversioned()
+            self.assertEqual(result, {})
+
+    def test_load_unversioned_migrates_legacy_file(self):
+        """Test that a legacy unversioned.txt loads as entries due for revalidation."""
+        with isolated_files() as tmppath:
+            (tmppath / "unversioned.txt").write_text("repo1\nrepo2\nrepo3\n")
+            result = fetch_versions.load_unversioned()
+
+        self.assertEqual(set(result), {"repo1", "repo2", "repo3"})
+        self.assertEqual(result["repo1"], {"reason": "legacy", "cached_at": None, "pushed_at": None})
+        now = datetime.now(timezone.utc)
+        self.assertFalse(fetch_versions.unversioned_is_fresh("repo1", result["repo1"], None, now))
+
+    def test_save_and_load_unversioned(self):
+        """Test that entries round-trip through unversioned.json, sorted by repo."""
+        entries = {
+            name: fetch_versions.unversioned_entry("no-version-tags", "2026-10-01T00:00:00Z")
+            for name in ("zebra", "alpha", "mango")
+        }
+        with isolated_files() as tmppath:
+            fetch_versions.save_unversioned(entries)
+            content = (tmppath / "unversioned.json").read_text()
+            result = fetch_versions.load_unversioned()
+
+        self.assertEqual(result, entries)
+        self.assertEqual(list(json.loads(content)), ["alpha", "mango", "zebra"])
+
+    def test_entry_freshness(self):
+        """Test expiry by age and invalidation by a new push."""
+        cached_at = datetime(2026, 10, 1, tzinfo=timezone.utc)
+        entry = {"reason": "no-version-tags", "cached_at": cached_at.isoformat(), "pushed_at": "2026-09-01T00:00:00Z"}
+
+        self.assertTrue(fetch_versions.unversioned_is_fresh("x", entry, "2026-09-01T00:00:00Z", cached_at + timedelta(days=1)))
+        self.assertFalse(fetch_versions.unversioned_is_fresh("x", entry, "2026-10-02T00:00:00Z", cached_at + timedelta(days=1)))
+        self.assertFalse(fetch_versions.unversioned_is_fresh("x", entry, "2026-09-01T00:00:00Z", cached_at + timedelta(days=11)))
 
-    def test_load_unversioned_with_repos(self):
-        """Test loading unversioned repos from file."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            unversioned_file = Path(tmpdir) / "unversioned.txt"
-            unversioned_file.write_text("repo1\nrepo2\nrepo3\n")
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_repos")
+    def test_errors_are_not_cached_as_unversioned(self, mock_fetch_repos, mock_fetch_tags):
+        """Test that a failed lookup neither marks a repo unversioned nor drops an existing entry."""
+        mock_fetch_repos.return_value = [RepoRecord("flaky"), RepoRecord("stale-entry"), RepoRecord("empty")]
 
-            with patch.object(fetch_versions, "UNVERSIONED_FILE", unversioned_file):
-                result = fetch_versions.load_unversioned()
-                self.assertEqual(result, {"repo1", "repo2", "repo3"})
+        def fetch_tags_side_effect(org, repo_name):
+            if repo_name == "empty":
+                raise fetch_versions.APIError("Git Repository is empty.", 409)
+            raise fetch_versions.APIError("Server Error", 502)
 
-    def test_save_unversioned(self):
-        """Test saving unversioned repos to file."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            unversioned_file = Path(tmpdir) / "unversioned.txt"
+        mock_fetch_tags.side_effect = fetch_tags_side_effect
+        stale = {"reason": "legacy", "cached_at": None, "pushed_at": None}
 
-            with patch.object(fetch_versions, "UNVERSIONED_FILE", unversioned_file):
-                fetch_versions.save_unversioned({"zebra", "alpha", "mango"})
+        with isolated_files() as tmppath:
+            fetch_versions.save_unversioned({"stale-entry": stale})
+            with contextlib.redirect_stderr(io.StringIO()):
+                fetch_versions.main([])
+            result = fetch_versions.load_unversioned()
 
-                content = unversioned_file.read_text()
-                lines = content.strip().split("\n")
-                # Should be sorted alphabetically
-                self.assertEqual(lines, ["alpha", "mango", "zebra"])
+        self.assertNotIn("flaky", result)
+        self.assertEqual(result["stale-entry"], stale)
+        self.assertEqual(result["empty"]["reason"], "empty-repository")
 
 
 class TestGetLatestVersionTag(unittest.TestCase):
@@ -200,6 +1436,21 @@ class TestGetLatestVersionTag(unittest.TestCase):
 class TestMain(unittest.TestCase):
     """Integration tests for the main function."""
 
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        cache_patch = patch.multiple(
+            fetch_versions,
+            HTTP_CACHE_FILE=Path(tmpdir.name) / "http_cache.json",
+            REPO_STATE_FILE=Path(tmpdir.name) / "repo_state.json",
+            REPORT_FILE=Path(tmpdir.name) / "report.json",
+            CHECKPOINT_FILE=Path(tmpdir.name) / "checkpoint.jsonl",
+            STALE_FILE=Path(tmpdir.name) / "stale.json",
+        )
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+    @patch("fetch_versions.update_readme")
     @patch("fetch_versions.save_unversioned")
     @patch("fetch_versions.load_unversioned")
     @patch("fetch_versions.VERSIONS_FILE")
@@ -214,6 +1465,7 @@ class TestMain(unittest.TestCase):
         mock_versions_file,
         mock_load_unversioned,
         mock_save_unversioned,
+        mock_update_readme,
     ):
         """Test the main function with mocked dependencies."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -223,13 +1475,13 @@ class TestMain(unittest.TestCase):
             mock_versions_file.__fspath__ = lambda self: str(versions_file)
 
             # No cached unversioned repos
-            mock_load_unversioned.return_value = set()
+            mock_load_unversioned.return_value = {}
 
             # Mock fetch_repos to return test data
             mock_fetch_repos.return_value = [
-                {"name": "setup-python"},
-                {"name": "setup-node"},
-                {"name": "no-tags-repo"},
+                RepoRecord("setup-python"),
+                RepoRecord("setup-node"),
+                RepoRecord("no-tags-repo"),
             ]
 
             # Mock fetch_tags to return tags for each repo
@@ -282,6 +1534,7 @@ class TestMain(unittest.TestCase):
             saved_unversioned = mock_save_unversioned.call_args[0][0]
             self.assertIn("no-tags-repo", saved_unversioned)
 
+    @patch("fetch_versions.update_readme")
     @patch("fetch_versions.save_unversioned")
     @patch("fetch_versions.load_unversioned")
     @patch("fetch_versions.VERSIONS_FILE")
@@ -296,6 +1549,7 @@ class TestMain(unittest.TestCase):
         mock_versions_file,
         mock_load_unversioned,
         mock_save_unversioned,
+        mock_update_readme,
     ):
         """Test that cached unversioned repos are skipped."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -305,12 +1559,14 @@ class TestMain(unittest.TestCase):
             mock_versions_file.__fspath__ = lambda self: str(versions_file)
 
             # Cached unversioned repos
-            mock_load_unversioned.return_value = {"cached-no-tags"}
+            mock_load_unversioned.return_value = {
+                "cached-no-tags": fetch_versions.unversioned_entry("no-version-tags", None),
+            }
 
             # Mock fetch_repos to return test data including cached repo
             mock_fetch_repos.return_value = [
-                {"name": "setup-python"},
-                {"name": "cached-no-tags"},
+                RepoRecord("setup-python"),
+                RepoRecord("cached-no-tags"),
             ]
 
             # Mock fetch_tags - should only be called for setup-python
@@ -333,6 +1589,552 @@ class TestMain(unittest.TestCase):
             mock_fetch_tags.assert_called_with("actions", "setup-python")
 
 
+class TestConcurrentMain(unittest.TestCase):
+    """Tests for fetching tags for several repos at once."""
+
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_repos")
+    def test_fetches_concurrently(self, mock_fetch_repos, mock_fetch_tags):
+        """Test that tag fetches overlap when several workers are used."""
+        mock_fetch_repos.return_value = [RepoRecord("a"), RepoRecord("b"), RepoRecord("c")]
+        # Every fetch waits for the others, so this deadlocks unless they run at once
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fetch_tags_side_effect(org, repo_name):
+            barrier.wait()
+            return ["v1"]
+
+        mock_fetch_tags.side_effect = fetch_tags_side_effect
+
+        with isolated_files() as tmppath:
+            fetch_versions.main(["--workers", "3"])
+            content = (tmppath / "versions.txt").read_text()
+
+        self.assertEqual(content, "actions/a@v1\nactions/b@v1\nactions/c@v1\n")
+
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_repos")
+    def test_output_matches_sequential(self, mock_fetch_repos, mock_fetch_tags):
+        """Test that concurrent and sequential runs write identical files."""
+        names = [f"repo-{i}" for i in range(20)]
+        mock_fetch_repos.return_value = [RepoRecord(name) for name in names]
+        mock_fetch_tags.side_effect = lambda org, repo_name: (
+            [] if repo_name.endswith("3") else [f"v{len(repo_name)}", "v1"]
+        )
+
+        outputs = []
+        for workers in ("1", "8"):
+            with isolated_files() as tmppath:
+                fetch_versions.main(["--workers", workers])
+                outputs.append(
+                    ((tmppath / "versions.txt").read_text(), list(fetch_versions.load_unversioned()))
+                )
+
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0][1], ["repo-13", "repo-3"])
+
+
+def graphql_refs(names, end_cursor=None):
+    """Build the refs connection GraphQL returns for one aliased repository."""
+    return {
+        "refs": {
+            "nodes": [{"name": name} for name in names],
+            "pageInfo": {"hasNextPage": end_cursor is not None, "endCursor": end_cursor},
+        }
+    }
+
+
+class TestStreaming(unittest.TestCase):
+    """Tests for fetching tags while the repo listing is still coming in."""
+
+    def test_bounded_map(self):
+        """Test that only limit items are pulled ahead of the results, which keep their order."""
+        pulled = []
+
+        def items():
+            for i in range(10):
+                pulled.append(i)
+                yield i
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = fetch_versions.bounded_map(executor, lambda i: i * i, items(), 3)
+            self.assertEqual(next(results), (0, 0))
+            self.assertEqual(len(pulled), 3)
+            self.assertEqual(list(results), [(i, i * i) for i in range(1, 10)])
+
+    def test_bounded_map_finishes_items_pulled_before_error(self):
+        """Test that results for items already pulled are yielded before the items' error is raised."""
+
+        def items():
+            yield from range(3)
+            raise fetch_versions.APIError("Server Error", 502)
+
+        results = []
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            with self.assertRaises(fetch_versions.APIError):
+                for result in fetch_versions.bounded_map(executor, lambda i: i * i, items(), 8):
+                    results.append(result)
+
+        self.assertEqual(results, [(0, 0), (1, 1), (2, 4)])
+
+    @patch("fetch_versions.fetch_tags", return_value=["v3"])
+    @patch("fetch_versions.fetch_repos")
+    def test_listing_failure_keeps_repos_already_listed(self, mock_fetch_repos, mock_fetch_tags):
+        """Test that with --partial, repos resolved before the listing failed are still written out."""
+
+        def fetch_repos(owner, kind):
+            yield RepoRecord("a")
+            yield RepoRecord("b")
+            raise fetch_versions.APIError("Server Error", 502)
+
+        mock_fetch_repos.side_effect = fetch_repos
+
+        for backend in ("rest", "graphql"):
+            with self.subTest(backend=backend), isolated_files() as tmppath, \
+                    patch.dict("os.environ", {"GITHUB_TOKEN": "t"}), \
+                    patch("fetch_versions.fetch_tags_graphql", side_effect=lambda owner, names: {name: ["v3"] for name in names}), \
+                    contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                fetch_versions.main(["--partial", "--backend", backend])
+                content = (tmppath / "versions.txt").read_text()
+                report = json.loads((tmppath / "report.json").read_text())
+
+            self.assertEqual(content, "actions/a@v3\nactions/b@v3\n")
+            self.assertEqual((report["repos"]["fetched"], report["repos"]["versioned"]), (2, 2))
+
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_repos")
+    def test_tags_fetched_while_listing(self, mock_fetch_repos, mock_fetch_tags):
+        """Test that tag lookups start before the last listing page arrives."""
+        first_lookup = threading.Event()
+
+        def fetch_repos(owner, kind):
+            yield RepoRecord("a")
+            # The next page only arrives once a tag lookup has started on the first
+            if not first_lookup.wait(timeout=5):
+                raise AssertionError("no tags were fetched until the listing finished")
+            yield RepoRecord("b")
+
+        def fetch_tags(org, repo_name):
+            first_lookup.set()
+            return ["v1"]
+
+        mock_fetch_repos.side_effect = fetch_repos
+        mock_fetch_tags.side_effect = fetch_tags
+
+        with isolated_files() as tmppath:
+            fetch_versions.main(["--workers", "2"])
+            content = (tmppath / "versions.txt").read_text()
+
+        self.assertEqual(content, "actions/a@v1\nactions/b@v1\n")
+
+
+class TestGraphQLBackend(unittest.TestCase):
+    """Tests for fetching tags with batched GraphQL queries."""
+
+    def test_build_tags_query(self):
+        """Test that each repo gets an aliased, prefix-filtered refs lookup."""
+        query, aliases = fetch_versions.build_tags_query("actions", {"checkout": None, "cache": "Y3Vy"})
+
+        self.assertEqual(aliases, {"r0": "checkout", "r1": "cache"})
+        self.assertIn('r0: repository(owner: "actions", name: "checkout")', query)
+        self.assertIn('refs(refPrefix: "refs/tags/v", first: 100)', query)
+        self.assertIn('first: 100, after: "Y3Vy"', query)
+        self.assertIn("nodes { name }", query)
+
+    @patch("fetch_versions.graphql_query")
+    def test_fetch_tags_graphql_batches_and_pages(self, mock_query):
+        """Test batching repos per query and following refs pagination."""
+        mock_query.side_effect = [
+            {"data": {"r0": graphql_refs(["1", "2"], end_cursor="c1"), "r1": graphql_refs([]), "r2": None}},
+            {"data": {"r0": graphql_refs(["10"])}},
+        ]
+
+        with patch.object(fetch_versions, "GRAPHQL_BATCH_SIZE", 3):
+            tags = fetch_versions.fetch_tags_graphql("actions", ["big", "empty", "missing"])
+
+        self.assertEqual((tags["big"], tags["empty"]), (["v1", "v2", "v10"], []))
+        # A null result with no error of its own is a failed lookup, not a repo without tags
+        self.assertIsInstance(tags["missing"], fetch_versions.APIError)
+        self.assertEqual(mock_query.call_count, 2)
+        self.assertIn('after: "c1"', mock_query.call_args_list[1][0][0])
+        self.assertEqual(fetch_versions.get_latest_version_tag(tags["big"]), "v10")
+
+    @patch("fetch_versions.graphql_query")
+    def test_fetch_tags_graphql_errors_map_to_repos(self, mock_query):
+        """Test that an error with a path is reported against that repo only."""
+        mock_query.return_value = {
+            "data": {"r0": graphql_refs(["3"]), "r1": None},
+            "errors": [{"type": "NOT_FOUND", "path": ["r1"], "message": "Could not resolve to a Repository"}],
+        }
+
+        tags = fetch_versions.fetch_tags_graphql("actions", ["cache", "gone"])
+
+        self.assertEqual(tags["cache"], ["v3"])
+        self.assertIsInstance(tags["gone"], fetch_versions.APIError)
+        self.assertEqual(tags["gone"].status, 404)
+
+    @patch("fetch_versions.graphql_query")
+    def test_fetch_tags_graphql_query_error_fails_batch(self, mock_query):
+        """Test that an error for the whole query, like a timeout, fails every repo in the batch."""
+        mock_query.return_value = {"data": None, "errors": [{"message": "Something went wrong: timeout"}]}
+
+        tags = fetch_versions.fetch_tags_graphql("actions", ["cache", "checkout"])
+
+        self.assertEqual([str(tags[repo]) for repo in ("cache", "checkout")], ["Something went wrong: timeout"] * 2)
+
+    @patch("fetch_versions.graphql_query")
+    def test_fetch_tags_graphql_splits_batches(self, mock_query):
+        """Test that repos beyond the batch size go into another query."""
+        mock_query.side_effect = lambda query: {
+            "data": {alias: graphql_refs(["1"]) for alias in ("r0", "r1") if f"{alias}:" in query}
+        }
+
+        with patch.object(fetch_versions, "GRAPHQL_BATCH_SIZE", 2):
+            tags = fetch_versions.fetch_tags_graphql("actions", ["a", "b", "c"])
+
+        self.assertEqual(mock_query.call_count, 2)
+        self.assertEqual(tags, {"a": ["v1"], "b": ["v1"], "c": ["v1"]})
+
+    @patch.dict("os.environ", {"GITHUB_TOKEN": "t"})
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_tags_graphql")
+    @patch("fetch_versions.fetch_repos")
+    def test_main_graphql_backend(self, mock_fetch_repos, mock_fetch_tags_graphql, mock_fetch_tags):
+        """Test that main() uses the GraphQL backend instead of per-repo REST calls."""
+        mock_fetch_repos.return_value = [RepoRecord("setup-node"), RepoRecord("docs")]
+        mock_fetch_tags_graphql.return_value = {"setup-node": ["v3", "v4"], "docs": []}
+
+        with isolated_files() as tmppath:
+            fetch_versions.main(["--backend", "graphql"])
+            content = (tmppath / "versions.txt").read_text()
+
+        self.assertEqual(content, "actions/setup-node@v4\n")
+        mock_fetch_tags_graphql.assert_called_once_with("actions", ["setup-node", "docs"])
+        mock_fetch_tags.assert_not_called()
+
+    @patch("fetch_versions.api_request")
+    def test_graphql_query_raises_api_error(self, mock_request):
+        """Test that failed GraphQL requests raise APIError, like the REST tag sources."""
+        mock_request.side_effect = [
+            json_response({"message": "Bad credentials"}, status=401),
+            fetch_versions.Response(502, {}, b"<html>Unicorn!</html>"),
+            json_response({"message": "Something went wrong"}),
+        ]
+
+        with patch.object(fetch_versions, "rate_limiter", fetch_versions.RateLimitScheduler(tokens=["t"])):
+            errors = []
+            for _ in range(3):
+                with self.assertRaises(fetch_versions.APIError) as caught:
+                    fetch_versions.graphql_query("{}")
+                errors.append((str(caught.exception), caught.exception.status))
+
+        self.assertEqual(errors, [("Bad credentials", 401), ("HTTP 502", 502), ("Something went wrong", 200)])
+
+    @patch.dict("os.environ", {"GITHUB_TOKEN": "t"})
+    @patch("fetch_versions.api_request")
+    @patch("fetch_versions.fetch_repos")
+    def test_main_graphql_failure_is_per_repo(self, mock_fetch_repos, mock_request):
+        """Test that a failed GraphQL query counts its repos as failed instead of ending the run."""
+        mock_fetch_repos.return_value = [RepoRecord("setup-node"), RepoRecord("docs")]
+        mock_request.return_value = json_response({"message": "Bad credentials"}, status=401)
+
+        with isolated_files() as tmppath, contextlib.redirect_stdout(io.StringIO()) as stdout, \
+                contextlib.redirect_stderr(io.StringIO()):
+            fetch_versions.main(["--backend", "graphql"])
+            report = json.loads((tmppath / "report.json").read_text())
+
+        self.assertEqual(report["repos"]["failed"], 2)
+        self.assertIn("Failed to fetch tags for 2 repos: actions/setup-node, actions/docs", stdout.getvalue())
+
+    @patch.dict("os.environ", {}, clear=True)
+    def test_graphql_backend_requires_token(self):
+        """Test that --backend graphql without a token is rejected up front."""
+        with self.assertRaises(SystemExit):
+            with contextlib.redirect_stderr(io.StringIO()):
+                fetch_versions.parse_args(["--backend", "graphql"])
+
+
+END_TO_END_FIXTURE = {
+    "orgs": {
+        "actions": [
+            {"name": "checkout", "id": 1, "pushed_at": "2026-10-01T00:00:00Z",
+             "tags": ["v1", "v1.0.0", "v6", "v6.0.1", "v7", "v7.0.0"]},
+            {"name": "cache", "id": 2, "pushed_at": "2026-10-02T00:00:00Z",
+             "tags": [f"v{major}.{minor}.0" for major in range(1, 7) for minor in range(40)] + ["v5", "v6"]},
+            {"name": "actions-sync", "id": 3, "pushed_at": "2026-10-03T00:00:00Z",
+             "tags": ["v202404231422", "v202606241747"]},
+            {"name": "docs", "id": 4, "pushed_at": "2026-10-04T00:00:00Z", "tags": ["release-1"]},
+            {"name": "empty", "id": 5, "pushed_at": None, "tags": []},
+        ]
+    }
+}
+END_TO_END_VERSIONS = "actions/actions-sync@v202606241747\nactions/cache@v6\nactions/checkout@v7\n"
+
+
+class TestEndToEnd(unittest.TestCase):
+    """Run main() against the local fake GitHub server with each fetch strategy."""
+
+    def setUp(self):
+        self.fake = FakeGitHub(END_TO_END_FIXTURE)
+        self.server = FakeGitHubServer(self.fake).start()
+        self.addCleanup(self.server.stop)
+        url_patch = patch.multiple(fetch_versions, GITHUB_API_URL=self.server.url, GITHUB_SERVER_URL=self.server.url)
+        url_patch.start()
+        self.addCleanup(url_patch.stop)
+
+    def run_main(self, *args):
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            fetch_versions.main(list(args))
+
+    def test_every_strategy_agrees(self):
+        """Test that every backend and tag source produces the same versions.txt."""
+        strategies = [
+            ["--workers", "1"],
+            [],
+            ["--tag-source", "matching-refs"],
+            ["--tag-source", "git"],
+            ["--backend", "graphql"],
+            ["--hedge"],
+            ["--adaptive"],
+        ]
+        for args in strategies:
+            with self.subTest(args=args), isolated_files() as tmppath, patch.dict("os.environ", {"GITHUB_TOKEN": "t"}):
+                self.run_main(*args)
+                self.assertEqual((tmppath / "versions.txt").read_text(), END_TO_END_VERSIONS)
+                self.assertEqual(set(fetch_versions.load_unversioned()), {"docs", "empty"})
+
+    def test_graphql_timeout_is_not_cached_as_unversioned(self):
+        """Test that a GraphQL timeout ("data": null) counts as failed rather than as repos without tags."""
+        timeout = {"data": None, "errors": [{"message": "Something went wrong while executing your query. This may be the result of a timeout"}]}
+
+        with isolated_files() as tmppath, patch.dict("os.environ", {"GITHUB_TOKEN": "t"}), \
+                patch.object(self.fake, "graphql", return_value=timeout):
+            self.run_main("--backend", "graphql")
+            report = json.loads((tmppath / "report.json").read_text())
+            unversioned = fetch_versions.load_unversioned()
+
+        self.assertEqual(unversioned, {})
+        self.assertEqual(report["repos"]["failed"], 5)
+
+    def test_graphql_outage_carries_forward(self):
+        """Test that a GraphQL batch that keeps failing with an HTML 502 is carried forward instead of crashing the run."""
+
+        def bad_gateway(handler):
+            handler.rfile.read(int(handler.headers.get("Content-Length", 0)))
+            handler.send_body(502, b"<html><body>Unicorn!</body></html>", {"Content-Type": "text/html"})
+
+        with isolated_files() as tmppath, patch.dict("os.environ", {"GITHUB_TOKEN": "t"}):
+            self.run_main()
+            with patch.object(FakeGitHubHandler, "do_POST", bad_gateway), \
+                    patch.object(fetch_versions, "retrier", fetch_versions.Retrier(sleep=lambda seconds: None)):
+                self.run_main("--backend", "graphql", "--full", "--partial")
+            content = (tmppath / "versions.txt").read_text()
+            stale = fetch_versions.load_stale()
+
+        self.assertEqual(content, END_TO_END_VERSIONS)
+        self.assertEqual(set(stale), {"actions-sync", "cache", "checkout"})
+        self.assertIn("HTTP 502", stale["checkout"]["reason"])
+
+    def test_tag_pagination(self):
+        """Test that tag listing pages through a repo with more than 100 tags."""
+        with isolated_files():
+            self.run_main("--workers", "1")
+
+        # cache has 242 tags: three pages
+        self.assertEqual(self.fake.stats()["endpoints"]["tags"], 3 + 1 + 1 + 1 + 1)
+
+    def test_repeat_run_is_cheap(self):
+        """Test that a second run only revalidates the repo listing, and reports it."""
+        with isolated_files() as tmppath:
+            self.run_main()
+            self.fake.reset_stats()
+            self.run_main()
+
+            report = json.loads((tmppath / "report.json").read_text())
+
+        stats = self.fake.stats()
+        self.assertEqual(stats["endpoints"], {"repos": 1})
+        self.assertEqual(stats["not_modified"], 1)
+        self.assertEqual(report["http"]["requests"], 1)
+        self.assertEqual(report["conditional_requests"], {"hits": 1, "misses": 0})
+        repos = report["repos"]
+        self.assertEqual((repos["listed"], repos["fetched"], repos["unchanged_reused"]), (5, 0, 3))
+        self.assertEqual((repos["unversioned_skipped"], repos["versioned"], repos["failed"]), (2, 3, 0))
+
+    def test_incremental_probes(self):
+        """Test that --incremental probes instead of listing tags once state is discarded."""
+        with isolated_files():
+            self.run_main()
+            self.fake.reset_stats()
+            self.run_main("--incremental", "--full")
+
+        endpoints = self.fake.stats()["endpoints"]
+        # checkout and cache are probed (v8, v9 and v7, v8); actions-sync's calver is listed
+        self.assertEqual(endpoints["ref"], 4)
+        self.assertEqual(endpoints["tags"], 1)
+
+
+class TestRegressionGuard(unittest.TestCase):
+    """Tests for re-verifying downgrades and disappearances before publishing them."""
+
+    def setUp(self):
+        self.fake = FakeGitHub(END_TO_END_FIXTURE)
+        self.server = FakeGitHubServer(self.fake).start()
+        self.addCleanup(self.server.stop)
+        url_patch = patch.multiple(fetch_versions, GITHUB_API_URL=self.server.url, GITHUB_SERVER_URL=self.server.url)
+        url_patch.start()
+        self.addCleanup(url_patch.stop)
+
+    def run_main(self, tmppath, previous, args=()):
+        (tmppath / "versions.txt").write_text(previous)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            fetch_versions.main(list(args))
+        return (tmppath / "versions.txt").read_text(), fetch_versions.load_stale()
+
+    def test_find_regressions(self):
+        """Test that only lower majors and missing repos are suspicious."""
+        previous = {"a": "v3", "b": "v3", "c": "v3", "d": "v202404231422"}
+        latest = {"a": "v4", "b": "v2", "d": "v202606241747"}
+        self.assertEqual(fetch_versions.find_regressions(previous, latest), ["b", "c"])
+
+    def test_confirmed_regressions_are_published(self):
+        """Test that a deleted major, a repo that lost its tags and a removed repo are accepted once confirmed."""
+        previous = "actions/checkout@v8\nactions/docs@v1\nactions/removed@v2\n"
+        with isolated_files() as tmppath:
+            content, stale = self.run_main(tmppath, previous)
+
+        self.assertEqual(content, END_TO_END_VERSIONS)
+        self.assertEqual(stale, {})
+        self.assertEqual(self.fake.stats()["endpoints"]["ref"], 3)
+
+    def test_unconfirmed_regression_keeps_previous(self):
+        """Test that a truncated tag listing can't downgrade a repo whose previous tag still exists."""
+        real_fetch_tags = fetch_versions.fetch_tags
+
+        def flaky_fetch_tags(org, repo_name):
+            tags = real_fetch_tags(org, repo_name)
+            return ["v3"] if repo_name == "cache" else tags
+
+        with isolated_files() as tmppath, patch("fetch_versions.fetch_tags", side_effect=flaky_fetch_tags):
+            content, stale = self.run_main(tmppath, END_TO_END_VERSIONS)
+            repo_state = fetch_versions.load_repo_state()
+
+        self.assertEqual(content, END_TO_END_VERSIONS)
+        self.assertEqual(stale["cache"]["reason"], "lookup found v3 but v6 still exists")
+        self.assertNotIn("cache", repo_state)
+
+    def test_failed_lookup_without_partial_keeps_previous(self):
+        """Test that a repo whose lookup keeps failing isn't dropped unless its previous tag is confirmed gone."""
+        real_fetch_tags = fetch_versions.fetch_tags
+
+        def failing_fetch_tags(org, repo_name):
+            if repo_name == "checkout":
+                raise fetch_versions.APIError("Server Error", 502)
+            return real_fetch_tags(org, repo_name)
+
+        with isolated_files() as tmppath, patch("fetch_versions.fetch_tags", side_effect=failing_fetch_tags):
+            content, stale = self.run_main(tmppath, END_TO_END_VERSIONS, ["--full"])
+            report = json.loads((tmppath / "report.json").read_text())
+
+        self.assertEqual(content, END_TO_END_VERSIONS)
+        self.assertEqual(stale["checkout"]["reason"], "lookup failed and v7 still exists")
+        self.assertEqual((report["repos"]["failed"], report["repos"]["regressions_rejected"]), (1, 1))
+
+
+MULTI_OWNER_FIXTURE = {
+    "orgs": {
+        "actions": END_TO_END_FIXTURE["orgs"]["actions"],
+        "github": [
+            {"name": "codeql-action", "id": 10, "pushed_at": "2026-10-05T00:00:00Z", "tags": ["v3", "v4", "v4.1.0"]},
+            {"name": "docs", "id": 11, "pushed_at": "2026-10-06T00:00:00Z", "tags": []},
+        ],
+    },
+    "users": {"octocat": [{"name": "hello-action", "id": 20, "pushed_at": None, "tags": ["v1"]}]},
+}
+
+
+class TestMultipleOwners(unittest.TestCase):
+    """Tests for crawling several orgs and users in one run."""
+
+    def setUp(self):
+        self.fake = FakeGitHub(MULTI_OWNER_FIXTURE)
+        self.server = FakeGitHubServer(self.fake).start()
+        self.addCleanup(self.server.stop)
+        url_patch = patch.multiple(fetch_versions, GITHUB_API_URL=self.server.url, GITHUB_SERVER_URL=self.server.url)
+        url_patch.start()
+        self.addCleanup(url_patch.stop)
+
+    def run_main(self, *args):
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            fetch_versions.main(list(args))
+
+    def test_sections_and_state_per_owner(self):
+        """Test that each owner gets its own block of versions.txt and its own state files."""
+        with isolated_files() as tmppath:
+            self.run_main("--org", "actions", "--org", "github", "--user", "octocat")
+            content = (tmppath / "versions.txt").read_text()
+            files = sorted(path.name for path in tmppath.iterdir())
+            github_unversioned = fetch_versions.load_unversioned("github")
+            actions_unversioned = fetch_versions.load_unversioned()
+
+        self.assertEqual(
+            content, END_TO_END_VERSIONS + "github/codeql-action@v4\noctocat/hello-action@v1\n"
+        )
+        self.assertIn("repo_state.github.json", files)
+        self.assertIn("unversioned.octocat.json", files)
+        self.assertEqual(set(github_unversioned), {"docs"})
+        self.assertEqual(set(actions_unversioned), {"docs", "empty"})
+
+    def test_non_default_org_alone(self):
+        """Test that a non-default org on its own still gets its own files."""
+        with isolated_files() as tmppath:
+            self.run_main("--org", "github")
+            content = (tmppath / "versions.txt").read_text()
+            self.assertFalse((tmppath / "unversioned.json").exists())
+            self.assertTrue((tmppath / "unversioned.github.json").exists())
+
+        self.assertEqual(content, "github/codeql-action@v4\n")
+
+    @patch("fetch_versions.fetch_tags")
+    @patch("fetch_versions.fetch_repos")
+    def test_owners_crawled_concurrently(self, mock_fetch_repos, mock_fetch_tags):
+        """Test that every owner's listing is under way at the same time."""
+        # Each listing waits for the others, so this deadlocks unless they run at once
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fetch_repos(owner, kind):
+            barrier.wait()
+            yield RepoRecord(f"{owner}-action")
+
+        mock_fetch_repos.side_effect = fetch_repos
+        mock_fetch_tags.return_value = ["v2"]
+
+        with isolated_files() as tmppath:
+            self.run_main("--org", "a", "--org", "b", "--user", "c")
+            content = (tmppath / "versions.txt").read_text()
+
+        self.assertEqual(content, "a/a-action@v2\nb/b-action@v2\nc/c-action@v2\n")
+
+    def test_failed_listing_carried_forward(self):
+        """Test that with --partial an owner whose listing fails keeps its previous versions."""
+        with isolated_files() as tmppath:
+            (tmppath / "versions.txt").write_text("actions/checkout@v7\ngone/thing@v3\n")
+            self.run_main("--org", "actions", "--org", "gone", "--partial")
+            content = (tmppath / "versions.txt").read_text()
+            stale = fetch_versions.load_stale("gone")
+
+            with self.assertRaises(fetch_versions.APIError):
+                self.run_main("--org", "actions", "--org", "gone")
+
+        self.assertEqual(content, END_TO_END_VERSIONS + "gone/thing@v3\n")
+        self.assertEqual(stale["thing"]["reason"], "listing gone failed: Not Found")
+
+    def test_duplicate_owner_rejected(self):
+        """Test that an owner can't be given twice."""
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            fetch_versions.parse_args(["--org", "github", "--user", "GitHub"])
+
+
 class TestVersionPatternMatching(unittest.TestCase):
     """Tests for the version tag pattern matching."""
 
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Unit tests for synthetic_org.py
+"""
+
+import contextlib
+import io
+import unittest
+from collections import Counter
+from unittest.mock import patch
+
+import fetch_versions
+import synthetic_org
+from fake_github import FakeGitHub, FakeGitHubServer
+from test_fetch_versions import isolated_files
+
+
+class TestSyntheticOrg(unittest.TestCase):
+    """Tests for the synthetic org generator."""
+
+    def test_reproducible(self):
+        """Test that the same seed gives the same org."""
+        self.assertEqual(synthetic_org.generate_org(50, seed=3), synthetic_org.generate_org(50, seed=3))
+        self.assertNotEqual(synthetic_org.generate_org(50, seed=3), synthetic_org.generate_org(50, seed=4))
+
+    def test_latest_matches_get_latest_version_tag(self):
+        """Test that the recorded ground truth agrees with the real tag parser."""
+        for repo in synthetic_org.generate_org(500, seed=1):
+            self.assertEqual(fetch_versions.get_latest_version_tag(repo["tags"]), repo["latest"], repo["name"])
+
+    def test_mix_and_long_tail(self):
+        """Test the proportions of unversioned and calver repos, and the tag count tail."""
+        repos = synthetic_org.generate_org(3000, seed=2, max_tags=1000)
+        counts = sorted(len(repo["tags"]) for repo in repos)
+        latest = Counter(
+            "calver" if repo["latest"] and len(repo["latest"]) > 10 else "versioned" if repo["latest"] else "none"
+            for repo in repos
+        )
+
+        self.assertEqual(len({repo["name"] for repo in repos}), 3000)
+        self.assertLess(counts[len(counts) // 2], 20)
+        self.assertGreater(counts[-1], 500)
+        self.assertTrue(0.4 < latest["none"] / len(repos) < 0.55)
+        self.assertGreater(latest["calver"], 0)
+
+    def test_end_to_end(self):
+        """Test that a refresh against a served synthetic org matches its ground truth."""
+        fixture = synthetic_org.generate_fixture({"synthetic": 300}, seed=5, max_tags=500)
+
+        with FakeGitHubServer(FakeGitHub(fixture)) as server, isolated_files() as tmppath:
+            with patch.multiple(fetch_versions, ORG_NAME="synthetic", GITHUB_API_URL=server.url):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    fetch_versions.main([])
+            content = (tmppath / "versions.txt").read_text()
+
+        self.assertEqual(content, synthetic_org.expected_versions(fixture, "synthetic"))
+
+
+if __name__ == "__main__":
+    unittest.main()